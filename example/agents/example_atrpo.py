@@ -32,7 +32,7 @@ def train_atrpo():
 
     manual_seed(args.seed)
 
-    env = vectorize_env(env_id="reset_env/" + args.env_id, num_envs=args.num_envs)
+    env = vectorize_env(env_id="reset_env/" + args.env_id, num_envs=args.num_envs, copy=False)
 
     dim_state = env.observation_space.shape[-1]
     dim_action = env.action_space.shape[-1]
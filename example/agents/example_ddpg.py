@@ -29,7 +29,7 @@ def train_ddpg():
     manual_seed(args.seed)
 
     # make environment
-    env = vectorize_env(env_id=args.env_id, num_envs=args.num_envs)
+    env = vectorize_env(env_id=args.env_id, num_envs=args.num_envs, copy=False)
 
     dim_state = env.observation_space.shape[-1]
     dim_action = env.action_space.shape[-1]
@@ -46,6 +46,7 @@ def train_ddpg():
         dim_action=dim_action,
         gamma=args.gamma,
         replay_start_size=args.replay_start_size,
+        calc_stats=True,
     )
 
     evaluator = Evaluator(
@@ -1,13 +1,41 @@
 import argparse
 import os
 
+import torch
+import torch.distributed as dist
+from torch.nn.parallel import DistributedDataParallel
+
 import wandb
 from rl_algos.agents import SAC
-from rl_algos.experiments import Evaluator, Recoder, training
-from rl_algos.utils import logger, manual_seed
+from rl_algos.experiments import Evaluator, Recoder, training, training_with_async_rollout
+from rl_algos.utils import logger, manual_seed, synchronize_parameters
 from rl_algos.wrappers import make_env, vectorize_env
 
 
+def distribute_sac(agent: SAC):
+    """Wrap the networks trained by ``agent`` in DistributedDataParallel.
+
+    DDP broadcasts the parameters of rank 0 when wrapping, so the target networks are copied
+    again afterwards. The temperature is a single scalar, so its gradient is averaged by a
+    hook instead of a DDP wrapper.
+    """
+    device_ids = [agent.device.index] if agent.device.type == "cuda" else None
+    agent.q1 = DistributedDataParallel(agent.q1, device_ids=device_ids)
+    agent.q2 = DistributedDataParallel(agent.q2, device_ids=device_ids)
+    agent.policy = DistributedDataParallel(agent.policy, device_ids=device_ids)
+    synchronize_parameters(
+        src=(agent.q1, agent.q2), dst=(agent.q1_target, agent.q2_target), method="hard"
+    )
+
+    def all_reduce_mean(grad: torch.Tensor) -> torch.Tensor:
+        grad = grad.clone()
+        dist.all_reduce(grad)
+        return grad.div_(dist.get_world_size())
+
+    for param in agent.temperature_holder.parameters():
+        param.register_hook(all_reduce_mean)
+
+
 def train_sac():
     parser = argparse.ArgumentParser()
     parser.add_argument("--env_id", default="HalfCheetah-v4", type=str)
@@ -23,17 +51,32 @@ def train_sac():
     parser.add_argument("--replay_start_size", default=10**4, type=int)
     parser.add_argument("--num_videos", type=int, default=3)
     parser.add_argument("--save_model", action="store_true")
+    parser.add_argument("--async_rollout", action="store_true")
     args = parser.parse_args()
 
-    wandb.init(project=args.project, tags=["sac", args.env_id], group=args.group)
+    # Launched by `torchrun --nproc_per_node=N`: one sampler and agent per process, with
+    # gradients all-reduced by DistributedDataParallel.
+    distributed = "LOCAL_RANK" in os.environ
+    rank, local_rank = 0, 0
+    if distributed:
+        dist.init_process_group(backend="nccl" if torch.cuda.is_available() else "gloo")
+        rank, local_rank = dist.get_rank(), int(os.environ["LOCAL_RANK"])
+    device = torch.device(f"cuda:{local_rank}" if torch.cuda.is_available() else "cpu")
+
+    wandb.init(
+        project=args.project,
+        tags=["sac", args.env_id],
+        group=args.group,
+        mode=None if rank == 0 else "disabled",
+    )
 
     wandb.config.update(args)
 
     # fix seed
-    manual_seed(args.seed)
+    manual_seed(None if args.seed is None else args.seed + rank)
 
     # make environment
-    env = vectorize_env(env_id=args.env_id, num_envs=args.num_envs)
+    env = vectorize_env(env_id=args.env_id, num_envs=args.num_envs, copy=False)
 
     dim_state = env.observation_space.shape[-1]
     dim_action = env.action_space.shape[-1]
@@ -49,23 +92,32 @@ def train_sac():
         dim_state=dim_state,
         dim_action=dim_action,
         gamma=args.gamma,
+        device=device,
+        calc_stats=True,
     )
+    if distributed:
+        distribute_sac(agent)
 
-    evaluator = Evaluator(
-        env=make_env(args.env_id),
-        eval_interval=args.eval_interval,
-        num_evaluate=args.num_evaluate,
+    # Only rank 0 evaluates, records and logs
+    evaluator = (
+        Evaluator(
+            env=make_env(args.env_id),
+            eval_interval=args.eval_interval,
+            num_evaluate=args.num_evaluate,
+        )
+        if rank == 0
+        else None
     )
     recoder = (
         Recoder(
             env=make_env(args.env_id),
             record_interval=args.max_step // args.num_videos,
         )
-        if args.num_videos > 0
+        if args.num_videos > 0 and rank == 0
         else None
     )
 
-    agent = training(
+    agent = (training_with_async_rollout if args.async_rollout else training)(
         env=env,
         agent=agent,
         max_steps=args.max_step,
@@ -74,10 +126,13 @@ def train_sac():
         evaluator=evaluator,
     )
 
-    if args.save_model:
+    if args.save_model and rank == 0:
         os.mkdir(os.path.join(wandb.run.dir, "model"))
         agent.save(os.path.join(wandb.run.dir, "model"))
 
+    if distributed:
+        dist.destroy_process_group()
+
 
 if __name__ == "__main__":
     train_sac()
@@ -30,7 +30,7 @@ def train_td3():
 
     manual_seed(args.seed)
 
-    env = vectorize_env(env_id=args.env_id, num_envs=args.num_envs)
+    env = vectorize_env(env_id=args.env_id, num_envs=args.num_envs, copy=False)
     dim_state = env.observation_space.shape[-1]
     dim_action = env.action_space.shape[-1]
 
@@ -44,6 +44,7 @@ def train_td3():
         dim_state=dim_state,
         dim_action=dim_action,
         gamma=args.gamma,
+        calc_stats=True,
     )
 
     evaluator = Evaluator(
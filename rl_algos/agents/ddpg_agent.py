@@ -1,28 +1,32 @@
-import copy
 import logging
-from typing import Any, Dict, Type, Union
+from typing import Any, Dict, Optional, Type, Union
 
+import numpy as np
 import torch
 import torch.nn.functional as F
-from torch import cuda, distributions, nn
+from torch import cuda, nn
 from torch.optim import Adam, Optimizer
 
 from rl_algos.agents.agent_base import AgentBase, AttributeSavingMixin
 from rl_algos.buffers import ReplayBuffer, TrainingBatch
+from rl_algos.buffers.abstract_replay_buffer import AbstractReplayBuffer
 from rl_algos.explorers import ExplorerBase, GaussianExplorer
-from rl_algos.modules import ConcatStateAction, evaluating
+from rl_algos.modules import MLP, ConcatStateAction, evaluating
 from rl_algos.modules.distributions import DeterministicHead
-from rl_algos.utils import logger, synchronize_parameters
+from rl_algos.utils import compile_module, logger, synchronize_parameters
 from rl_algos.utils.statistics import Statistics
 
 
+@torch.jit.script
+def _q_target(
+    reward: torch.Tensor, terminal: torch.Tensor, discount: torch.Tensor, next_q: torch.Tensor
+) -> torch.Tensor:
+    return reward + (~terminal).to(reward.dtype) * discount * next_q.flatten()
+
+
 def default_policy_fn(dim_state, dim_action):
     net = nn.Sequential(
-        nn.Linear(dim_state, 400),
-        nn.ReLU(),
-        nn.Linear(400, 300),
-        nn.ReLU(),
-        nn.Linear(300, dim_action),
+        MLP(dim_state, dim_action, hidden_units=(400, 300)),
         nn.Tanh(),
         DeterministicHead(),
     )
@@ -33,11 +37,7 @@ def default_policy_fn(dim_state, dim_action):
 def default_q_fn(dim_state, dim_action):
     net = nn.Sequential(
         ConcatStateAction(),
-        nn.Linear(dim_state + dim_action, 400),
-        nn.ReLU(),
-        nn.Linear(400, 300),
-        nn.ReLU(),
-        nn.Linear(300, 1),
+        MLP(dim_state + dim_action, 1, hidden_units=(400, 300)),
     )
     return net
 
@@ -61,10 +61,11 @@ class DDPG(AttributeSavingMixin, AgentBase):
         tau: float = 5e-3,
         explorer: ExplorerBase = GaussianExplorer(0.1, -1, 1),
         gamma: float = 0.99,
-        replay_buffer: ReplayBuffer = ReplayBuffer(10**6),
+        replay_buffer: Optional[ReplayBuffer] = None,
         batch_size: int = 256,
         replay_start_size: int = 25e3,
-        calc_stats: bool = True,
+        calc_stats: bool = False,
+        compile_model: bool = False,
         optimizer_class: Type[Optimizer] = Adam,
         optimizer_kwargs: Dict[str, Any] = {},
         logger: logging.Logger = logger,
@@ -81,55 +82,85 @@ class DDPG(AttributeSavingMixin, AgentBase):
         self.gamma = gamma
 
         self.policy = policy_fn(self.dim_state, self.dim_action).to(self.device)
-        self.policy_target = copy.deepcopy(self.policy).eval().requires_grad_(False)
+        self.policy_target = (
+            policy_fn(self.dim_state, self.dim_action).to(self.device).eval().requires_grad_(False)
+        )
+        self.policy_head = self.policy[-1]
         self.policy_optimizer = optimizer_class(self.policy.parameters(), **optimizer_kwargs)
 
         self.q = q_fn(self.dim_state, self.dim_action).to(self.device)
-        self.q_target = copy.deepcopy(self.q).eval().requires_grad_(False)
+        self.q_target = (
+            q_fn(self.dim_state, self.dim_action).to(self.device).eval().requires_grad_(False)
+        )
         self.q_optimizer = optimizer_class(self.q.parameters(), **optimizer_kwargs)
 
-        self.replay_buffer = replay_buffer
+        synchronize_parameters(
+            src=(self.policy, self.q),
+            dst=(self.policy_target, self.q_target),
+            method="hard",
+        )
+
+        if compile_model:
+            for net in (self.policy, self.policy_target, self.q, self.q_target):
+                compile_module(net, mode="reduce-overhead", dynamic=False)
+
+        self.replay_buffer = (
+            ReplayBuffer(10**6, device=self.device) if replay_buffer is None else replay_buffer
+        )
+        if not isinstance(self.replay_buffer, AbstractReplayBuffer):
+            raise TypeError("replay_buffer must implement AbstractReplayBuffer.")
         self.batch_size = batch_size
+        # reused by every update so that sampling allocates no new batch tensors
+        self._batch = TrainingBatch.empty(batch_size, dim_state, dim_action, self.device)
         self.replay_start_size = replay_start_size
         self.explorer = explorer
         self.tau = tau
 
         self.num_update = 0
 
+        # pinned host buffer used to transfer states in act()
+        self._state_pinned: Optional[torch.Tensor] = None
+
         self.logger = logger
         self.stats = Statistics() if calc_stats else None
 
     def observe(self, states, next_states, actions, rewards, terminals, resets) -> None:
         if self.training:
-            for state, next_state, action, reward, terminal, reset in zip(
-                states, next_states, actions, rewards, terminals, resets
-            ):
-                self.replay_buffer.append(
-                    state=state,
-                    next_state=next_state,
-                    action=action,
-                    reward=reward,
-                    terminal=terminal,
-                    reset=reset,
-                )
+            self.replay_buffer.extend(
+                states=states,
+                next_states=next_states,
+                actions=actions,
+                rewards=rewards,
+                terminals=terminals,
+                resets=resets,
+            )
             self.update_if_dataset_is_ready()
 
     def act(self, states):
+        if self.training and len(self.replay_buffer) < self.replay_start_size:
+            # Warm-up actions never touch the device.
+            return np.random.uniform(-1, 1, (len(states), self.dim_action)).astype(np.float32)
+
         with torch.no_grad():
-            states = torch.tensor(states, device=self.device)
+            states = self._states_to_device(states)
+            # The deterministic head returns the action tensor without building a distribution.
+            with self.policy_head.deterministic():
+                actions: torch.Tensor = self.policy(states)
             if self.training:
-                if len(self.replay_buffer) < self.replay_start_size:
-                    actions = torch.rand(len(states), self.dim_action) * 2 - 1
-                else:
-                    action_distribs: distributions.Distribution = self.policy(states)
-                    actions: torch.Tensor = action_distribs.sample()
-                    actions = self.explorer.select_action(..., lambda: actions)
-            else:
-                with self.policy[-1].deterministic():
-                    actions = self.policy(states)
-
-        actions = actions.detach().cpu().numpy()
-        return actions
+                actions = self.explorer.select_action(..., lambda: actions)
+
+        # act() must return the actions right away, so a plain blocking copy back is used
+        return actions.cpu().numpy()
+
+    def _states_to_device(self, states) -> torch.Tensor:
+        states = torch.as_tensor(states)
+        if self.device.type != "cuda":
+            return states.to(self.device)
+        # Stage through a reused pinned buffer so that the copy can be asynchronous.
+        if self._state_pinned is None or self._state_pinned.shape != states.shape:
+            self._state_pinned = torch.empty_like(states).pin_memory()
+        self._state_pinned.copy_(states)
+        return self._state_pinned.to(self.device, non_blocking=True)
 
     def update_if_dataset_is_ready(self):
         assert self.training
@@ -138,8 +169,8 @@ class DDPG(AttributeSavingMixin, AgentBase):
             self.just_updated = True
             if self.num_update == 0:
                 self.logger.info("Start Update")
-            sampled = self.replay_buffer.sample(self.batch_size)
-            batch = TrainingBatch(**sampled, device=self.device)
+            self.replay_buffer.sample_into(self._batch)
+            batch = self._batch
             self._update_critic(batch)
             self._update_actor(batch)
             self._sync_target_network()
@@ -161,15 +192,13 @@ class DDPG(AttributeSavingMixin, AgentBase):
         with torch.no_grad(), evaluating(self.policy_target, self.q):
             next_actions: torch.Tensor = self.policy_target(batch.next_state).sample()
             next_q = self.q_target((batch.next_state, next_actions))
-            q_target = batch.reward + self.gamma * batch.terminal.logical_not() * torch.flatten(
-                next_q
-            )
+            q_target = _q_target(batch.reward, batch.terminal, batch.discount(self.gamma), next_q)
         q_pred = torch.flatten(self.q((batch.state, batch.action)))
         loss = F.mse_loss(q_pred, q_target)
         if self.stats is not None:
-            self.stats("q_pred").extend(q_pred.detach().cpu().numpy())
-            self.stats("q_target").extend(q_target.detach().cpu().numpy())
-            self.stats("q_loss").append(loss.detach().cpu().numpy())
+            self.stats("q_pred").append_tensor(q_pred)
+            self.stats("q_target").append_tensor(q_target)
+            self.stats("q_loss").append_tensor(loss)
 
         return loss
 
@@ -178,20 +207,14 @@ class DDPG(AttributeSavingMixin, AgentBase):
         q = self.q((batch.state, actions))
         policy_loss = -torch.mean(q)
         if self.stats is not None:
-            self.stats("policy_loss").append(float(policy_loss))
+            self.stats("policy_loss").append_tensor(policy_loss)
         return policy_loss
 
     def _sync_target_network(self):
         """Synchronize target network with current network."""
         synchronize_parameters(
-            src=self.policy,
-            dst=self.policy_target,
-            method="soft",
-            tau=self.tau,
-        )
-        synchronize_parameters(
-            src=self.q,
-            dst=self.q_target,
+            src=(self.policy, self.q),
+            dst=(self.policy_target, self.q_target),
             method="soft",
             tau=self.tau,
         )
@@ -1,19 +1,17 @@
-import copy
 import logging
 from typing import Any, Dict, Optional, Tuple, Type, Union
 
 import numpy as np
 import torch
-import torch.nn.functional as F
 from torch import cuda, distributions, nn
 from torch.optim import Adam, Optimizer
 
-import rl_algos
 from rl_algos.agents.agent_base import AgentBase, AttributeSavingMixin
 from rl_algos.buffers import ReplayBuffer, TrainingBatch
-from rl_algos.modules import evaluating, ortho_init
+from rl_algos.buffers.abstract_replay_buffer import AbstractReplayBuffer
+from rl_algos.modules import MLP, ConcatStateAction, evaluating
 from rl_algos.modules.distributions import SquashedDiagonalGaussianHead
-from rl_algos.utils import logger, synchronize_parameters
+from rl_algos.utils import compile_module, logger, synchronize_parameters
 from rl_algos.utils.statistics import Statistics
 
 
@@ -41,6 +39,27 @@ class TemperatureHolder(nn.Module):
         )
 
 
+@torch.jit.script
+def _soft_q_target(
+    reward: torch.Tensor,
+    terminal: torch.Tensor,
+    discount: torch.Tensor,
+    next_q1: torch.Tensor,
+    next_q2: torch.Tensor,
+    temperature: torch.Tensor,
+    next_log_prob: torch.Tensor,
+) -> torch.Tensor:
+    next_q = torch.min(next_q1, next_q2).flatten() - temperature * next_log_prob
+    return reward + (~terminal).to(reward.dtype) * discount * next_q
+
+
+@torch.jit.script
+def _double_q_loss(
+    q1_pred: torch.Tensor, q2_pred: torch.Tensor, q_target: torch.Tensor
+) -> torch.Tensor:
+    return 0.5 * ((q1_pred - q_target).square().mean() + (q2_pred - q_target).square().mean())
+
+
 def default_temparature_fn():
     temparature = TemperatureHolder()
     return temparature
@@ -48,12 +67,14 @@ def default_temparature_fn():
 
 def default_q_fn(dim_state, dim_action):
     net = nn.Sequential(
-        rl_algos.modules.ConcatStateAction(),
-        ortho_init(nn.Linear(dim_state + dim_action, 256), gain=np.sqrt(1.0 / 3.0)),
-        nn.ReLU(),
-        ortho_init(nn.Linear(256, 256), gain=np.sqrt(1.0 / 3.0)),
-        nn.ReLU(),
-        ortho_init(nn.Linear(256, 1), gain=np.sqrt(1.0 / 3.0)),
+        ConcatStateAction(),
+        MLP(
+            dim_state + dim_action,
+            1,
+            hidden_units=(256, 256),
+            hidden_gain=np.sqrt(1.0 / 3.0),
+            output_gain=np.sqrt(1.0 / 3.0),
+        ),
     )
 
     return net
@@ -61,11 +82,13 @@ def default_q_fn(dim_state, dim_action):
 
 def default_policy_fn(dim_state, dim_action):
     net = nn.Sequential(
-        ortho_init(nn.Linear(dim_state, 256), gain=np.sqrt(1.0 / 3.0)),
-        nn.ReLU(),
-        ortho_init(nn.Linear(256, 256), gain=np.sqrt(1.0 / 3.0)),
-        nn.ReLU(),
-        ortho_init(nn.Linear(256, dim_action * 2), gain=np.sqrt(1.0 / 3.0)),
+        MLP(
+            dim_state,
+            dim_action * 2,
+            hidden_units=(256, 256),
+            hidden_gain=np.sqrt(1.0 / 3.0),
+            output_gain=1e-2,
+        ),
         SquashedDiagonalGaussianHead(),
     )
 
@@ -94,7 +117,7 @@ class SAC(AttributeSavingMixin, AgentBase):
         policy_fn=default_policy_fn,
         temperature_fn=default_temparature_fn,
         target_entropy: Optional[float] = None,
-        replay_buffer: ReplayBuffer = ReplayBuffer(1e6),
+        replay_buffer: Optional[ReplayBuffer] = None,
         batch_size: int = 256,
         gamma: float = 0.99,
         tau: float = 5e-3,
@@ -103,13 +126,25 @@ class SAC(AttributeSavingMixin, AgentBase):
         optimizer_kwargs: Dict[str, Any] = {"lr": 3e-4},
         device: Union[str, torch.device] = torch.device("cuda:0" if cuda.is_available() else "cpu"),
         logger=logger,
-        calc_stats: bool = True,
+        calc_stats: bool = False,
+        compile_model: bool = False,
+        use_cuda_graph: bool = False,
     ):
         self.logger: logging.Logger = logger
         if isinstance(device, str):
             device = torch.device(device)
         self.device = device
 
+        self.use_cuda_graph = use_cuda_graph
+        self._cuda_graph: Optional[torch.cuda.CUDAGraph] = None
+        if use_cuda_graph:
+            if self.device.type != "cuda":
+                raise ValueError("use_cuda_graph requires a CUDA device.")
+            if calc_stats:
+                raise ValueError("use_cuda_graph cannot be used with calc_stats.")
+            # Optimizer steps must run on the device to be captured.
+            optimizer_kwargs = {**optimizer_kwargs, "capturable": True}
+
         self.dim_state = dim_state
         self.dim_action = dim_action
 
@@ -121,8 +156,18 @@ class SAC(AttributeSavingMixin, AgentBase):
         self.q2 = q_fn(self.dim_state, self.dim_action).to(self.device)
         self.q2_optimizer = optimizer_class(self.q2.parameters(), **optimizer_kwargs)
 
-        self.q1_target = copy.deepcopy(self.q1).eval().requires_grad_(False)
-        self.q2_target = copy.deepcopy(self.q2).eval().requires_grad_(False)
+        self.q1_target = (
+            q_fn(self.dim_state, self.dim_action).to(self.device).eval().requires_grad_(False)
+        )
+        self.q2_target = (
+            q_fn(self.dim_state, self.dim_action).to(self.device).eval().requires_grad_(False)
+        )
+
+        synchronize_parameters(
+            src=(self.q1, self.q2),
+            dst=(self.q1_target, self.q2_target),
+            method="hard",
+        )
 
         # configure Policy
         self.policy = policy_fn(dim_state, dim_action).to(self.device)
@@ -130,6 +175,10 @@ class SAC(AttributeSavingMixin, AgentBase):
 
         self.policy_head = self.policy[-1]
 
+        if compile_model:
+            for net in (self.policy, self.q1, self.q2, self.q1_target, self.q2_target):
+                compile_module(net, mode="reduce-overhead", dynamic=False)
+
         # configure Temperature
         self.temperature_holder = temperature_fn().to(self.device)
         self.temperature_optimizer = optimizer_class(
@@ -142,8 +191,14 @@ class SAC(AttributeSavingMixin, AgentBase):
             self.target_entropy = float(target_entropy)
 
         # configure Replay Buffer
-        self.replay_buffer = replay_buffer
+        self.replay_buffer = (
+            ReplayBuffer(10**6, device=self.device) if replay_buffer is None else replay_buffer
+        )
+        if not isinstance(self.replay_buffer, AbstractReplayBuffer):
+            raise TypeError("replay_buffer must implement AbstractReplayBuffer.")
         self.batch_size = batch_size
+        # reused by every update so that sampling allocates no new batch tensors
+        self._batch = TrainingBatch.empty(batch_size, dim_state, dim_action, self.device)
 
         # discount factor
         self.gamma = gamma
@@ -155,6 +210,7 @@ class SAC(AttributeSavingMixin, AgentBase):
 
         self.stats = Statistics() if calc_stats else None
 
+    @torch.no_grad()
     def act(self, state: np.ndarray) -> np.ndarray:
         state = torch.tensor(state, device=self.device, requires_grad=False)
         if self.training:
@@ -167,22 +223,19 @@ class SAC(AttributeSavingMixin, AgentBase):
             with self.policy_head.deterministic():
                 action = self.policy(state)
 
-        action = action.detach().cpu().numpy()
+        action = action.cpu().numpy()
         return action
 
     def observe(self, states, next_states, actions, rewards, terminals, resets):
         if self.training:
-            for state, next_state, action, reward, terminal, reset in zip(
-                states, next_states, actions, rewards, terminals, resets
-            ):
-                self.replay_buffer.append(
-                    state=state,
-                    next_state=next_state,
-                    action=action,
-                    reward=reward,
-                    terminal=terminal,
-                    reset=reset,
-                )
+            self.replay_buffer.extend(
+                states=states,
+                next_states=next_states,
+                actions=actions,
+                rewards=rewards,
+                terminals=terminals,
+                resets=resets,
+            )
             self.update_if_dataset_is_ready()
 
     def update_if_dataset_is_ready(self):
@@ -190,11 +243,38 @@ class SAC(AttributeSavingMixin, AgentBase):
         self.just_updated = False
         if len(self.replay_buffer) > self.replay_start_size:
             self.just_updated = True
-            sampled = self.replay_buffer.sample(self.batch_size)
-            batch = TrainingBatch(**sampled, device=self.device)
-            self._update_q(batch)
-            self._update_policy_and_temperature(batch)
-            self._sync_target_network()
+            self.replay_buffer.sample_into(self._batch)
+            batch = self._batch
+            if self.use_cuda_graph:
+                self._update_with_cuda_graph(batch)
+            else:
+                self._update(batch)
+
+    def _update(self, batch: TrainingBatch):
+        self._update_q(batch)
+        self._update_policy_and_temperature(batch)
+        self._sync_target_network()
+
+    def _update_with_cuda_graph(self, batch: TrainingBatch):
+        """Run the update by replaying a captured CUDA graph.
+
+        ``batch`` must be the preallocated ``self._batch``, whose tensors keep fixed addresses.
+        The first call runs a warm-up update on a side stream and then captures one update;
+        later calls only replay the graph on the freshly sampled contents of ``batch``.
+        """
+        if self._cuda_graph is None:
+            stream = torch.cuda.Stream(self.device)
+            stream.wait_stream(torch.cuda.current_stream(self.device))
+            with torch.cuda.stream(stream):
+                self._update(batch)
+            torch.cuda.current_stream(self.device).wait_stream(stream)
+
+            self._cuda_graph = torch.cuda.CUDAGraph()
+            with torch.cuda.graph(self._cuda_graph):
+                self._update(batch)
+            return
+
+        self._cuda_graph.replay()
 
     def _update_q(self, batch: TrainingBatch):
         q_loss = self.compute_q_loss(batch)
@@ -209,36 +289,36 @@ class SAC(AttributeSavingMixin, AgentBase):
         self.policy_loss, self.temperature_loss = self.compute_policy_and_temperature_loss(batch)
 
         self.policy_optimizer.zero_grad()
-        self.policy_loss.backward()
-        self.policy_optimizer.step()
-
         self.temperature_optimizer.zero_grad()
-        self.temperature_loss.backward()
+        # The two losses depend on disjoint parameters (the temperature is detached in the policy
+        # loss and log_prob in the temperature loss), so a single backward pass suffices.
+        (self.policy_loss + self.temperature_loss).backward()
+        self.policy_optimizer.step()
         self.temperature_optimizer.step()
 
     def compute_q_loss(self, batch: TrainingBatch):
         with torch.no_grad(), evaluating(self.policy, self.q1_target, self.q2_target):
             next_action_distrib: distributions.Distribution = self.policy(batch.next_state)
-            next_action = next_action_distrib.sample()
-            next_log_prob = next_action_distrib.log_prob(next_action)
-            next_q = torch.min(
+            next_action, next_log_prob = next_action_distrib.rsample_with_log_prob()
+            q_target = _soft_q_target(
+                batch.reward,
+                batch.terminal,
+                batch.discount(self.gamma),
                 self.q1_target((batch.next_state, next_action)),
                 self.q2_target((batch.next_state, next_action)),
-            )
-            entropy_term = float(self.temperature_holder()) * next_log_prob[..., None]
-            q_target = batch.reward + batch.terminal.logical_not() * self.gamma * torch.flatten(
-                next_q - entropy_term
+                self.temperature_holder(),
+                next_log_prob,
             )
 
         q1_pred = torch.flatten(self.q1((batch.state, batch.action)))
         q2_pred = torch.flatten(self.q2((batch.state, batch.action)))
 
-        loss = 0.5 * (F.mse_loss(q1_pred, q_target) + F.mse_loss(q2_pred, q_target))
+        loss = _double_q_loss(q1_pred, q2_pred, q_target)
 
         if self.stats is not None:
-            self.stats("q1_pred").extend(q1_pred.detach().cpu().numpy())
-            self.stats("q2_pred").extend(q2_pred.detach().cpu().numpy())
-            self.stats("q_loss").append(float(loss))
+            self.stats("q1_pred").append_tensor(q1_pred)
+            self.stats("q2_pred").append_tensor(q2_pred)
+            self.stats("q_loss").append_tensor(loss)
 
         return loss
 
@@ -246,31 +326,24 @@ class SAC(AttributeSavingMixin, AgentBase):
         self, batch: TrainingBatch
     ) -> Tuple[torch.Tensor, torch.Tensor]:
         action_distrib: distributions.Distribution = self.policy(batch.state)
-        action = action_distrib.rsample()
-        log_prob: torch.Tensor = action_distrib.log_prob(action)
+        action, log_prob = action_distrib.rsample_with_log_prob()
         q: torch.Tensor = torch.min(self.q1((batch.state, action)), self.q2((batch.state, action)))
-        policy_loss = torch.mean(float(self.temperature_holder()) * log_prob - q.flatten())
+        policy_loss = torch.mean(self.temperature_holder().detach() * log_prob - q.flatten())
 
         temperature_loss = -torch.mean(
             self.temperature_holder() * (log_prob.detach() + self.target_entropy)
         )
         if self.stats is not None:
-            self.stats("policy_loss").append(float(policy_loss))
-            self.stats("temperature_loss").append(float(temperature_loss))
-            self.stats("entropy").extend(-log_prob.detach().cpu().numpy())
+            self.stats("policy_loss").append_tensor(policy_loss)
+            self.stats("temperature_loss").append_tensor(temperature_loss)
+            self.stats("entropy").append_tensor(-log_prob)
         return policy_loss, temperature_loss
 
     def _sync_target_network(self):
         """Synchronize target network with current network."""
         synchronize_parameters(
-            src=self.q1,
-            dst=self.q1_target,
-            method="soft",
-            tau=self.tau,
-        )
-        synchronize_parameters(
-            src=self.q2,
-            dst=self.q2_target,
+            src=(self.q1, self.q2),
+            dst=(self.q1_target, self.q2_target),
             method="soft",
             tau=self.tau,
         )
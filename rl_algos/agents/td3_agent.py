@@ -1,6 +1,5 @@
-import copy
 import logging
-from typing import Any, Dict, Type, Union
+from typing import Any, Dict, Optional, Type, Union
 
 import torch
 import torch.nn.functional as F
@@ -9,10 +8,11 @@ from torch.optim import Adam, Optimizer
 
 from rl_algos.agents.agent_base import AgentBase, AttributeSavingMixin
 from rl_algos.buffers import ReplayBuffer, TrainingBatch
+from rl_algos.buffers.abstract_replay_buffer import AbstractReplayBuffer
 from rl_algos.explorers import ExplorerBase, GaussianExplorer
-from rl_algos.modules import ConcatStateAction, evaluating
+from rl_algos.modules import MLP, ConcatStateAction, evaluating
 from rl_algos.modules.distributions import DeterministicHead
-from rl_algos.utils import logger, synchronize_parameters
+from rl_algos.utils import compile_module, logger, synchronize_parameters
 from rl_algos.utils.statistics import Statistics
 
 
@@ -24,11 +24,7 @@ def default_target_policy_smoothing_func(batch_action):
 
 def default_policy_fn(dim_state, dim_action):
     net = nn.Sequential(
-        nn.Linear(dim_state, 400),
-        nn.ReLU(),
-        nn.Linear(400, 300),
-        nn.ReLU(),
-        nn.Linear(300, dim_action),
+        MLP(dim_state, dim_action, hidden_units=(400, 300)),
         nn.Tanh(),
         DeterministicHead(),
     )
@@ -39,11 +35,7 @@ def default_policy_fn(dim_state, dim_action):
 def default_q_fn(dim_state, dim_action):
     net = nn.Sequential(
         ConcatStateAction(),
-        nn.Linear(dim_state + dim_action, 400),
-        nn.ReLU(),
-        nn.Linear(400, 300),
-        nn.ReLU(),
-        nn.Linear(300, 1),
+        MLP(dim_state + dim_action, 1, hidden_units=(400, 300)),
     )
 
     return net
@@ -74,10 +66,11 @@ class TD3(AttributeSavingMixin, AgentBase):
         tau: float = 5e-3,
         explorer: ExplorerBase = GaussianExplorer(0.1, -1, 1),
         gamma: float = 0.99,
-        replay_buffer: ReplayBuffer = ReplayBuffer(10**6),
+        replay_buffer: Optional[ReplayBuffer] = None,
         batch_size: int = 256,
         replay_start_size: int = 25e3,
-        calc_stats: bool = True,
+        calc_stats: bool = False,
+        compile_model: bool = False,
         optimizer_class: Type[Optimizer] = Adam,
         optimizer_kwargs: Dict[str, Any] = {"lr": 1e-3},
         logger: logging.Logger = logger,
@@ -94,7 +87,9 @@ class TD3(AttributeSavingMixin, AgentBase):
 
         self.policy = policy_fn(self.dim_state, self.dim_action).to(self.device)
         self.policy_optimizer = optimizer_class(self.policy.parameters(), **optimizer_kwargs)
-        self.policy_target = copy.deepcopy(self.policy).eval().requires_grad_(False)
+        self.policy_target = (
+            policy_fn(self.dim_state, self.dim_action).to(self.device).eval().requires_grad_(False)
+        )
 
         self.policy_update_delay = policy_update_delay
         self.policy_smoothing_func = policy_smoothing_func
@@ -106,11 +101,38 @@ class TD3(AttributeSavingMixin, AgentBase):
         self.q2 = q_fn(self.dim_state, self.dim_action).to(self.device)
         self.q2_optimizer = optimizer_class(self.q2.parameters(), **optimizer_kwargs)
 
-        self.q1_target = copy.deepcopy(self.q1).eval().requires_grad_(False)
-        self.q2_target = copy.deepcopy(self.q2).eval().requires_grad_(False)
+        self.q1_target = (
+            q_fn(self.dim_state, self.dim_action).to(self.device).eval().requires_grad_(False)
+        )
+        self.q2_target = (
+            q_fn(self.dim_state, self.dim_action).to(self.device).eval().requires_grad_(False)
+        )
+
+        synchronize_parameters(
+            src=(self.policy, self.q1, self.q2),
+            dst=(self.policy_target, self.q1_target, self.q2_target),
+            method="hard",
+        )
+
+        if compile_model:
+            for net in (
+                self.policy,
+                self.policy_target,
+                self.q1,
+                self.q2,
+                self.q1_target,
+                self.q2_target,
+            ):
+                compile_module(net, mode="reduce-overhead", dynamic=False)
 
-        self.replay_buffer = replay_buffer
+        self.replay_buffer = (
+            ReplayBuffer(10**6, device=self.device) if replay_buffer is None else replay_buffer
+        )
+        if not isinstance(self.replay_buffer, AbstractReplayBuffer):
+            raise TypeError("replay_buffer must implement AbstractReplayBuffer.")
         self.batch_size = batch_size
+        # reused by every update so that sampling allocates no new batch tensors
+        self._batch = TrainingBatch.empty(batch_size, dim_state, dim_action, self.device)
         self.replay_start_size = replay_start_size
         self.explorer = explorer
 
@@ -125,18 +147,15 @@ class TD3(AttributeSavingMixin, AgentBase):
 
     def observe(self, states, next_states, actions, rewards, terminals, resets) -> None:
         if self.training:
-            for state, next_state, action, reward, terminal, reset in zip(
-                states, next_states, actions, rewards, terminals, resets
-            ):
-                self.t += 1
-                self.replay_buffer.append(
-                    state=state,
-                    next_state=next_state,
-                    action=action,
-                    reward=reward,
-                    terminal=terminal,
-                    reset=reset,
-                )
+            self.t += len(states)
+            self.replay_buffer.extend(
+                states=states,
+                next_states=next_states,
+                actions=actions,
+                rewards=rewards,
+                terminals=terminals,
+                resets=resets,
+            )
             self.update_if_dataset_is_ready()
 
     def act(self, states):
@@ -163,8 +182,8 @@ class TD3(AttributeSavingMixin, AgentBase):
             self.just_updated = True
             if self.num_q_update == 0:
                 self.logger.info("Start Update")
-            sampled = self.replay_buffer.sample(self.batch_size)
-            batch = TrainingBatch(**sampled, device=self.device)
+            self.replay_buffer.sample_into(self._batch)
+            batch = self._batch
             self._update_critic(batch)
             if self.num_q_update % self.policy_update_delay == 0:
                 self._update_actor(batch)
@@ -197,19 +216,18 @@ class TD3(AttributeSavingMixin, AgentBase):
             next_q2 = self.q2_target((batch.next_state, next_actions))
             next_q = torch.min(next_q1, next_q2)
 
-            q_target = batch.reward + self.gamma * batch.terminal.logical_not() * torch.flatten(
-                next_q
-            )
+            discount = batch.discount(self.gamma)
+            q_target = batch.reward + discount * ~batch.terminal * torch.flatten(next_q)
         q1_pred = torch.flatten(self.q1((batch.state, batch.action)))
         q2_pred = torch.flatten(self.q2((batch.state, batch.action)))
 
         loss = F.mse_loss(q1_pred, q_target) + F.mse_loss(q2_pred, q_target)
 
         if self.stats is not None:
-            self.stats("q1_pred").extend(q1_pred.detach().cpu().numpy())
-            self.stats("q2_pred").extend(q2_pred.detach().cpu().numpy())
-            self.stats("q_target").extend(q_target.detach().cpu().numpy())
-            self.stats("q_loss").append(loss.detach().cpu().numpy())
+            self.stats("q1_pred").append_tensor(q1_pred)
+            self.stats("q2_pred").append_tensor(q2_pred)
+            self.stats("q_target").append_tensor(q_target)
+            self.stats("q_loss").append_tensor(loss)
 
         return loss
 
@@ -218,26 +236,14 @@ class TD3(AttributeSavingMixin, AgentBase):
         q = self.q1((batch.state, actions))
         policy_loss = -torch.mean(q)
         if self.stats is not None:
-            self.stats("policy_loss").append(float(policy_loss))
+            self.stats("policy_loss").append_tensor(policy_loss)
         return policy_loss
 
     def _sync_target_network(self):
         """Synchronize target network with current network."""
         synchronize_parameters(
-            src=self.policy,
-            dst=self.policy_target,
-            method="soft",
-            tau=self.tau,
-        )
-        synchronize_parameters(
-            src=self.q1,
-            dst=self.q1_target,
-            method="soft",
-            tau=self.tau,
-        )
-        synchronize_parameters(
-            src=self.q2,
-            dst=self.q2_target,
+            src=(self.policy, self.q1, self.q2),
+            dst=(self.policy_target, self.q1_target, self.q2_target),
             method="soft",
             tau=self.tau,
         )
@@ -1,5 +1,26 @@
+from rl_algos.buffers.array_replay_buffer import ArrayReplayBuffer
 from rl_algos.buffers.batch import EpisodicTrainingBatch, TrainingBatch
 from rl_algos.buffers.episode_buffer import EpisodeBuffer
+from rl_algos.buffers.n_step_buffer import NStepBuffer
+from rl_algos.buffers.prioritized_replay_buffer import (
+    LaBERArrayReplayBuffer,
+    LaBERMixin,
+    PrioritizedArrayReplayBuffer,
+    PrioritizedMixin,
+)
 from rl_algos.buffers.replay_buffer import ReplayBuffer
+from rl_algos.buffers.sharded_replay_buffer import ShardedReplayBuffer
 
-__all__ = ["TrainingBatch", "EpisodicTrainingBatch", "ReplayBuffer", "EpisodeBuffer"]
+__all__ = [
+    "TrainingBatch",
+    "EpisodicTrainingBatch",
+    "ReplayBuffer",
+    "ArrayReplayBuffer",
+    "PrioritizedMixin",
+    "PrioritizedArrayReplayBuffer",
+    "LaBERMixin",
+    "LaBERArrayReplayBuffer",
+    "ShardedReplayBuffer",
+    "NStepBuffer",
+    "EpisodeBuffer",
+]
@@ -1,15 +1,17 @@
-from abc import ABCMeta, abstractmethod
-from typing import Optional
+from typing import Any, Optional, Protocol, Tuple, runtime_checkable
 
 
-class AbstractReplayBuffer(object, metaclass=ABCMeta):
+@runtime_checkable
+class AbstractReplayBuffer(Protocol):
     """Defines a common interface of replay buffer.
     You can append transitions to the replay buffer and later sample from it.
     Replay buffers are typically used in experience replay.
     (copy from https://github.com/pfnet/pfrl/blob/master/pfrl/replay_buffer.py)
+
+    This is a structural interface: any class that implements these members is accepted, with or
+    without inheriting from it.
     """
 
-    @abstractmethod
     def append(self, transition):
         """Append a transition to this replay buffer.
         Args:
@@ -23,9 +25,17 @@ class AbstractReplayBuffer(object, metaclass=ABCMeta):
                 which env a given transition came from in multi-env training.
             **kwargs: Any other information to store.
         """
-        raise NotImplementedError
+        ...
+
+    def extend(self, states, next_states, actions, rewards, terminals, resets, **kwargs):
+        """Append a batch of transitions to this replay buffer.
+        Args:
+            states, next_states, actions, rewards, terminals, resets: Sequences with one element
+                per transition, as passed to ``append``.
+            **kwargs: Any other information to store, one element per transition.
+        """
+        ...
 
-    @abstractmethod
     def sample(self, n, **kwargs):
         """Sample n unique transitions from this replay buffer.
         Args:
@@ -33,36 +43,58 @@ class AbstractReplayBuffer(object, metaclass=ABCMeta):
         Returns:
             Sequence of n sampled transitions.
         """
-        raise NotImplementedError
+        ...
+
+    def sample_into(self, batch):
+        """Sample ``len(batch)`` transitions and write them into the tensors of ``batch``.
+        Args:
+            batch (TrainingBatch): Preallocated batch to fill, e.g. from ``TrainingBatch.empty``.
+        """
+        ...
 
-    @abstractmethod
     def __len__(self):
         """Return the number of transitions in the buffer.
         Returns:
             Number of transitions in the buffer.
         """
-        raise NotImplementedError
+        ...
 
-    @abstractmethod
     def save(self, filename):
         """Save the content of the buffer to a file.
         Args:
             filename (str): Path to a file.
         """
-        raise NotImplementedError
+        ...
 
-    @abstractmethod
     def load(self, filename):
         """Load the content of the buffer from a file.
         Args:
             filename (str): Path to a file.
         """
-        raise NotImplementedError
+        ...
 
     @property
-    @abstractmethod
     def capacity(self) -> Optional[int]:
         """Returns the capacity of the buffer in number of transitions.
         If unbounded, returns None instead.
         """
-        raise NotImplementedError
+        ...
+
+    @property
+    def state_shape(self) -> Optional[Tuple[int, ...]]:
+        """Returns the shape of a single stored state.
+        If not known yet (e.g. nothing is stored), returns None instead.
+        """
+        ...
+
+    @property
+    def action_shape(self) -> Optional[Tuple[int, ...]]:
+        """Returns the shape of a single stored action.
+        If not known yet (e.g. nothing is stored), returns None instead.
+        """
+        ...
+
+    @property
+    def dtype(self) -> Any:
+        """Returns the dtype in which states and actions are stored."""
+        ...
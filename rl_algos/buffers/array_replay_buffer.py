@@ -0,0 +1,286 @@
+import json
+import numbers
+import os
+import zipfile
+from typing import Dict, Optional, Tuple, Union
+
+import numpy as np
+import torch
+
+from rl_algos.buffers.abstract_replay_buffer import AbstractReplayBuffer
+from rl_algos.buffers.batch import TrainingBatch
+from rl_algos.utils.sample_n_k import sample_indices
+
+
+def _take_rows(memory: np.ndarray, indices: np.ndarray) -> np.ndarray:
+    # np.take copies whole rows with memcpy-sized moves and beats fancy indexing on 2D+ arrays,
+    # while fancy indexing is faster for 1D arrays of scalars.
+    return np.take(memory, indices, axis=0) if memory.ndim > 1 else memory[indices]
+
+
+class ArrayReplayBuffer(AbstractReplayBuffer):
+    """Experience Replay Buffer backed by pre-allocated NumPy arrays.
+
+    Unlike ``ReplayBuffer``, the shapes of states and actions are given up front, and every field
+    (state, next_state, action, reward, terminal, reset, n_steps) is allocated at construction as
+    one contiguous circular array of ``capacity`` rows. Appending writes rows in place and sampling
+    is a single fancy-indexed gather per field, wrapped by ``torch.from_numpy`` without a copy.
+    ``n_steps`` is the number of environment steps spanned by each transition and defaults to 1.
+
+    The capacity is rounded up to a power of two, so that ring positions are wrapped with a
+    bitmask instead of an integer modulo.
+
+    Args:
+        capacity (int): capacity in terms of number of transitions (rounded up to a power of two)
+        state_shape (tuple of int): shape of a single state
+        action_shape (tuple of int): shape of a single action
+        dtype: dtype in which states and actions are stored
+        mmap_path (str, optional): If given, each field is backed by a ``np.memmap`` file named
+            ``"{mmap_path}.{field}"`` instead of memory, so that the OS pages cold transitions
+            out to disk. The files are only opened on first use, and existing files are mapped as
+            they are rather than truncated (a file of a different size raises ``ValueError``),
+            so a buffer can be rebuilt on the same path before ``load``. ``save`` then only
+            flushes the files and writes a small JSON sidecar, and ``load`` maps the files again
+            with the layout recorded in the sidecar.
+        rng (np.random.Generator, np.random.SeedSequence or int, optional): Generator used for
+            sampling, or a seed for it (e.g. a child of the SeedSequence returned by
+            ``manual_seed``). Defaults to a freshly seeded ``np.random.default_rng()``.
+    """
+
+    # Implements AbstractReplayBuffer.capacity
+    capacity: Optional[int] = None
+
+    _fields = ("state", "next_state", "action", "reward", "terminal", "reset", "n_steps")
+
+    def __init__(
+        self,
+        capacity: int,
+        state_shape: Union[int, Tuple[int, ...]],
+        action_shape: Union[int, Tuple[int, ...]],
+        dtype=np.float32,
+        mmap_path: Optional[str] = None,
+        rng: Union[np.random.Generator, np.random.SeedSequence, int, None] = None,
+    ):
+        self.capacity = 1 << (int(capacity) - 1).bit_length()
+        self._mask = self.capacity - 1
+        self._state_shape = tuple(np.atleast_1d(state_shape).tolist())
+        self._action_shape = tuple(np.atleast_1d(action_shape).tolist())
+        self._dtype = np.dtype(dtype)
+        self.mmap_path = mmap_path
+        self._memory: Optional[Dict[str, np.ndarray]] = None if mmap_path else self._allocate()
+        self._rng = np.random.default_rng(rng)
+        # recycled pinned host tensors used to transfer sampled batches to CUDA devices
+        self._pinned: Optional[Dict[str, torch.Tensor]] = None
+        self._pinned_event: Optional[torch.cuda.Event] = None
+        self._index = 0  # position where the next transition is written
+        self._size = 0
+
+    def _layout(self) -> Dict[str, Tuple[Tuple[int, ...], np.dtype]]:
+        return dict(
+            state=((self.capacity, *self._state_shape), self._dtype),
+            next_state=((self.capacity, *self._state_shape), self._dtype),
+            action=((self.capacity, *self._action_shape), self._dtype),
+            reward=((self.capacity,), np.dtype(np.float32)),
+            terminal=((self.capacity,), np.dtype(np.bool_)),
+            reset=((self.capacity,), np.dtype(np.bool_)),
+            n_steps=((self.capacity,), np.dtype(np.int64)),
+        )
+
+    def _allocate(self) -> Dict[str, np.ndarray]:
+        return {
+            key: self._empty(key, shape, dtype) for key, (shape, dtype) in self._layout().items()
+        }
+
+    def _empty(self, key: str, shape: Tuple[int, ...], dtype: np.dtype) -> np.ndarray:
+        if self.mmap_path is None:
+            return np.empty(shape, dtype=dtype)
+        path = f"{self.mmap_path}.{key}"
+        if not os.path.isfile(path):
+            return np.memmap(path, dtype=dtype, mode="w+", shape=shape)
+        # Never truncate an existing file, since it may hold the transitions to be loaded
+        nbytes = int(np.prod(shape)) * dtype.itemsize
+        if os.path.getsize(path) != nbytes:
+            raise ValueError(
+                f"{path} has {os.path.getsize(path)} bytes, but {nbytes} bytes are expected"
+            )
+        return np.memmap(path, dtype=dtype, mode="r+", shape=shape)
+
+    @property
+    def memory(self) -> Dict[str, np.ndarray]:
+        if self._memory is None:
+            self._memory = self._allocate()
+        return self._memory
+
+    @property
+    def state_shape(self) -> Tuple[int, ...]:
+        return self._state_shape
+
+    @property
+    def action_shape(self) -> Tuple[int, ...]:
+        return self._action_shape
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self._dtype
+
+    def append(self, state, next_state, action, reward, terminal, reset, n_steps=1):
+        i = self._index
+        self.memory["state"][i] = state
+        self.memory["next_state"][i] = next_state
+        self.memory["action"][i] = action
+        self.memory["reward"][i] = reward
+        self.memory["terminal"][i] = terminal
+        self.memory["reset"][i] = reset
+        self.memory["n_steps"][i] = n_steps
+        self._index = (i + 1) & self._mask
+        self._size = min(self._size + 1, self.capacity)
+
+    def extend(self, states, next_states, actions, rewards, terminals, resets, n_steps=1):
+        """Append a batch of transitions with at most two slice assignments per field."""
+        transitions = dict(
+            state=np.asarray(states),
+            next_state=np.asarray(next_states),
+            action=np.asarray(actions),
+            reward=np.asarray(rewards),
+            terminal=np.asarray(terminals),
+            reset=np.asarray(resets),
+        )
+        n = len(transitions["state"])
+        transitions["n_steps"] = np.broadcast_to(n_steps, (n,))
+        if n > self.capacity:
+            transitions = {key: value[-self.capacity :] for key, value in transitions.items()}
+            n = self.capacity
+
+        n_first = min(n, self.capacity - self._index)
+        for key, value in transitions.items():
+            memory = self.memory[key]
+            memory[self._index : self._index + n_first] = value[:n_first]
+            memory[: n - n_first] = value[n_first:]
+
+        self._index = (self._index + n) & self._mask
+        self._size = min(self._size + n, self.capacity)
+
+    def _physical_index(self, idx):
+        return (self._index - self._size + idx) & self._mask
+
+    def __getitem__(self, idx):
+        if isinstance(idx, numbers.Integral):
+            if not -self._size <= idx < self._size:
+                raise IndexError("ArrayReplayBuffer index out of range")
+            i = self._physical_index(int(idx) % self._size)
+        elif isinstance(idx, slice):
+            i = self._physical_index(np.arange(*idx.indices(self._size)))
+        elif isinstance(idx, (np.ndarray, list)) and np.asarray(idx).dtype.kind in "iu":
+            idx = np.asarray(idx)
+            if np.any((idx < -self._size) | (idx >= self._size)):
+                raise IndexError("ArrayReplayBuffer index out of range")
+            i = self._physical_index(idx % self._size)
+        else:
+            raise TypeError(f"ArrayReplayBuffer indices must be integers, not {type(idx).__name__}")
+        return {key: memory[i] for key, memory in self.memory.items()}
+
+    def _sample_indices(self, n) -> np.ndarray:
+        """Return the storage rows of n distinct transitions drawn uniformly at random."""
+        return sample_indices(self._size, n, self._rng)
+
+    def sample(self, n) -> Dict[str, torch.Tensor]:
+        """Sample n distinct transitions uniformly at random as CPU tensors."""
+        assert self._size >= n
+        i = self._sample_indices(n)
+        return {key: torch.from_numpy(_take_rows(memory, i)) for key, memory in self.memory.items()}
+
+    def _sample_pinned(self, n) -> Dict[str, torch.Tensor]:
+        """Gather n random transitions into the recycled pinned host tensors."""
+        assert self._size >= n
+        if self._pinned is None or len(self._pinned["state"]) < n:
+            self._pinned = {
+                key: torch.from_numpy(np.empty((n, *memory.shape[1:]), memory.dtype)).pin_memory()
+                for key, memory in self.memory.items()
+            }
+        elif self._pinned_event is not None:
+            # The previous transfer may still be reading the pinned tensors
+            self._pinned_event.synchronize()
+        i = self._sample_indices(n)
+        pinned = {key: value[:n] for key, value in self._pinned.items()}
+        for key, memory in self.memory.items():
+            np.take(memory, i, axis=0, out=pinned[key].numpy())
+        return pinned
+
+    def _record_transfer(self, device: torch.device):
+        self._pinned_event = torch.cuda.Event()
+        self._pinned_event.record(torch.cuda.current_stream(device))
+
+    def sample_batch_to(self, n, device: Union[str, torch.device]) -> Dict[str, torch.Tensor]:
+        """Sample n transitions as tensors on ``device``.
+
+        For CUDA devices, the transitions are gathered into pinned host memory and copied with
+        ``non_blocking=True``, so the transfer overlaps with work already queued on the device.
+        """
+        device = torch.device(device)
+        if device.type != "cuda":
+            return {key: value.to(device) for key, value in self.sample(n).items()}
+        sampled = {
+            key: value.to(device, non_blocking=True)
+            for key, value in self._sample_pinned(n).items()
+        }
+        self._record_transfer(device)
+        return sampled
+
+    def sample_into(self, batch: TrainingBatch):
+        """Sample ``len(batch)`` transitions and write them into the tensors of ``batch``.
+
+        Batches on CUDA devices are filled asynchronously through pinned memory.
+        """
+        device = batch.state.device
+        if device.type != "cuda":
+            for key, value in self.sample(len(batch)).items():
+                if getattr(batch, key) is not None:
+                    getattr(batch, key).copy_(value)
+            return
+        for key, value in self._sample_pinned(len(batch)).items():
+            if getattr(batch, key) is not None:
+                getattr(batch, key).copy_(value, non_blocking=True)
+        self._record_transfer(device)
+
+    def __len__(self):
+        return self._size
+
+    def save(self, filename):
+        if self.mmap_path is None:
+            with open(filename, "wb") as f:
+                np.savez(f, index=self._index, size=self._size, **self.memory)
+        else:
+            for memory in self.memory.values():
+                memory.flush()
+            with open(filename, "w") as f:
+                json.dump(
+                    dict(
+                        mmap_path=self.mmap_path,
+                        capacity=self.capacity,
+                        state_shape=self._state_shape,
+                        action_shape=self._action_shape,
+                        dtype=self._dtype.str,
+                        index=self._index,
+                        size=self._size,
+                    ),
+                    f,
+                )
+
+    def load(self, filename):
+        if zipfile.is_zipfile(filename):
+            with np.load(filename) as data:
+                for key in self._fields:
+                    self.memory[key][...] = data[key]
+                self._index, self._size = int(data["index"]), int(data["size"])
+        else:
+            with open(filename, "r") as f:
+                meta = json.load(f)
+            self.mmap_path = meta["mmap_path"]
+            self.capacity = meta["capacity"]
+            self._mask = self.capacity - 1
+            self._state_shape = tuple(meta["state_shape"])
+            self._action_shape = tuple(meta["action_shape"])
+            self._dtype = np.dtype(meta["dtype"])
+            self._pinned = None
+            self._memory = self._allocate()
+            self._index, self._size = meta["index"], meta["size"]
@@ -6,7 +6,7 @@ import torch
 
 def _to_torch_tensor(arr, device):
     if isinstance(arr, torch.Tensor):
-        return arr
+        return arr if device is None else arr.to(device)
     elif isinstance(arr, np.ndarray):
         return torch.tensor(arr, device=device)
     elif isinstance(arr, list):
@@ -16,8 +16,24 @@ def _to_torch_tensor(arr, device):
 
 
 class TrainingBatch(object):
+    """Batch of transitions as tensors.
+
+    ``n_steps`` optionally holds the number of environment steps spanned by each transition
+    (e.g. by ``NStepBuffer``), so that the bootstrap discount of a transition is
+    ``gamma**n_steps``.
+    """
+
     def __init__(
-        self, state, next_state, action, reward, terminal, reset, device=None, **kwargs
+        self,
+        state,
+        next_state,
+        action,
+        reward,
+        terminal,
+        reset,
+        n_steps=None,
+        device=None,
+        **kwargs,
     ) -> None:
         super().__init__()
         self.state = _to_torch_tensor(state, device)
@@ -26,6 +42,28 @@ class TrainingBatch(object):
         self.reward = _to_torch_tensor(reward, device)
         self.terminal = _to_torch_tensor(terminal, device)
         self.reset = _to_torch_tensor(reset, device)
+        self.n_steps = None if n_steps is None else _to_torch_tensor(n_steps, device)
+
+    @classmethod
+    def empty(
+        cls, batch_size: int, dim_state: int, dim_action: int, device=None
+    ) -> "TrainingBatch":
+        """Allocate an uninitialized batch to be filled by ``ReplayBuffer.sample_into``."""
+        return cls(
+            state=torch.empty((batch_size, dim_state), device=device),
+            next_state=torch.empty((batch_size, dim_state), device=device),
+            action=torch.empty((batch_size, dim_action), device=device),
+            reward=torch.empty((batch_size,), device=device),
+            terminal=torch.empty((batch_size,), dtype=torch.bool, device=device),
+            reset=torch.empty((batch_size,), dtype=torch.bool, device=device),
+            n_steps=torch.empty((batch_size,), dtype=torch.int64, device=device),
+        )
+
+    def discount(self, gamma: float) -> torch.Tensor:
+        """Return the bootstrap discount ``gamma**n_steps`` of each transition."""
+        if self.n_steps is None:
+            return torch.full_like(self.reward, gamma)
+        return gamma**self.n_steps
 
     def __getitem__(self, idx):
         return TrainingBatch(
@@ -35,6 +73,7 @@ class TrainingBatch(object):
             reward=self.reward[idx],
             terminal=self.terminal[idx],
             reset=self.reset[idx],
+            n_steps=None if self.n_steps is None else self.n_steps[idx],
         )
 
     def __setitem__(self, idx, batch: "TrainingBatch"):
@@ -44,6 +83,7 @@ class TrainingBatch(object):
         self.reward = batch.reward[idx]
         self.terminal = batch.terminal[idx]
         self.reset = batch.reset[idx]
+        self.n_steps = None if batch.n_steps is None else batch.n_steps[idx]
 
     def to(self, device):
         return TrainingBatch(
@@ -53,6 +93,7 @@ class TrainingBatch(object):
             reward=self.reward.to(device),
             terminal=self.terminal.to(device),
             reset=self.reset.to(device),
+            n_steps=None if self.n_steps is None else self.n_steps.to(device),
         )
 
     def __len__(self):
@@ -0,0 +1,128 @@
+import collections
+from typing import Deque, Dict, Tuple
+
+from rl_algos.buffers.abstract_replay_buffer import AbstractReplayBuffer
+
+
+class NStepBuffer(AbstractReplayBuffer):
+    """Wrap a replay buffer so that it stores n-step transitions.
+
+    Transitions passed to ``append``/``extend`` are queued per environment. Once ``n`` of them
+    are queued, the oldest one is stored in the wrapped buffer with the discounted reward sum
+    ``R = sum_k gamma**k * r_k`` and the state reached ``n`` steps later as its next state. When an
+    episode terminates or is reset (e.g. truncated by a time limit), all queued transitions of
+    that environment are flushed with the truncated returns. Every stored transition records the
+    number of steps ``k`` it spans as ``n_steps``, and agents bootstrap it with ``gamma**k``.
+
+    Sampling, saving and loading are delegated to the wrapped buffer, as is any other attribute
+    (e.g. ``update_priorities``). Queued transitions are not saved.
+
+    Args:
+        replay_buffer (AbstractReplayBuffer): buffer that stores the n-step transitions
+        n (int): number of steps
+        gamma (float): discount factor
+    """
+
+    def __init__(self, replay_buffer: AbstractReplayBuffer, n: int = 3, gamma: float = 0.99):
+        assert n >= 1
+        self.replay_buffer = replay_buffer
+        self.n = n
+        self.gamma = gamma
+        # env_id -> queue of (state, next_state, action, reward)
+        self._queues: Dict[int, Deque[Tuple]] = collections.defaultdict(collections.deque)
+
+    def __getattr__(self, name):
+        # Looked up through __dict__ so that copy/pickle, which call __getattr__ before
+        # __init__ has run, get an AttributeError instead of infinite recursion
+        try:
+            replay_buffer = self.__dict__["replay_buffer"]
+        except KeyError:
+            raise AttributeError(name) from None
+        return getattr(replay_buffer, name)
+
+    @property
+    def capacity(self):
+        return self.replay_buffer.capacity
+
+    @property
+    def state_shape(self):
+        return self.replay_buffer.state_shape
+
+    @property
+    def action_shape(self):
+        return self.replay_buffer.action_shape
+
+    @property
+    def dtype(self):
+        return self.replay_buffer.dtype
+
+    def _pop(self, queue: Deque[Tuple], next_state, terminal, reset) -> Tuple:
+        state, _, action, _ = queue[0]
+        reward = sum(self.gamma**k * r for k, (_, _, _, r) in enumerate(queue))
+        n_steps = len(queue)
+        queue.popleft()
+        return state, next_state, action, reward, terminal, reset, n_steps
+
+    def _store(self, transitions):
+        if transitions:
+            states, next_states, actions, rewards, terminals, resets, n_steps = zip(*transitions)
+            self.replay_buffer.extend(
+                states=states,
+                next_states=next_states,
+                actions=actions,
+                rewards=rewards,
+                terminals=terminals,
+                resets=resets,
+                n_steps=n_steps,
+            )
+
+    def append(self, state, next_state, action, reward, terminal, reset, env_id: int = 0):
+        self._store(self._push(env_id, state, next_state, action, reward, terminal, reset))
+
+    def extend(self, states, next_states, actions, rewards, terminals, resets):
+        """Append one transition per environment, where the i-th transition belongs to env i."""
+        transitions = []
+        for env_id, transition in enumerate(
+            zip(states, next_states, actions, rewards, terminals, resets)
+        ):
+            transitions.extend(self._push(env_id, *transition))
+        self._store(transitions)
+
+    def _push(self, env_id, state, next_state, action, reward, terminal, reset):
+        queue = self._queues[env_id]
+        queue.append((state, next_state, action, reward))
+        transitions = []
+        if terminal or reset:
+            while queue:
+                transitions.append(self._pop(queue, next_state, terminal, reset))
+        elif len(queue) == self.n:
+            transitions.append(self._pop(queue, next_state, False, False))
+        return transitions
+
+    def stop_current_episode(self, env_id: int = 0):
+        """Flush the queued transitions of ``env_id`` as if its episode had been reset."""
+        queue = self._queues[env_id]
+        if queue:
+            next_state = queue[-1][1]
+            transitions = []
+            while queue:
+                transitions.append(self._pop(queue, next_state, False, True))
+            self._store(transitions)
+
+    def sample(self, n, **kwargs):
+        return self.replay_buffer.sample(n, **kwargs)
+
+    def sample_into(self, batch):
+        self.replay_buffer.sample_into(batch)
+
+    def __getitem__(self, idx):
+        return self.replay_buffer[idx]
+
+    def __len__(self):
+        return len(self.replay_buffer)
+
+    def save(self, filename):
+        self.replay_buffer.save(filename)
+
+    def load(self, filename):
+        self.replay_buffer.load(filename)
@@ -0,0 +1,103 @@
+import numpy as np
+
+from rl_algos.buffers.array_replay_buffer import ArrayReplayBuffer
+from rl_algos.collections.sum_tree import SumTree
+
+
+class PrioritizedMixin(object):
+    """Mixin that adds proportional prioritized sampling to ``ArrayReplayBuffer``.
+
+    As described in https://arxiv.org/abs/1511.05952. Newly written transitions get the maximum
+    priority seen so far, and ``sample``/``sample_into`` draw transitions with probability
+    proportional to their priority, stratified over ``n`` segments of a sum tree. The storage
+    rows and importance sampling weights of the last sample are kept in ``last_indices`` and
+    ``last_weights``; pass the rows back to ``update_priorities`` with the new TD errors.
+
+    Args:
+        alpha (float): exponent applied to the TD errors to get priorities
+        beta (float): exponent of the importance sampling weights
+        eps (float): constant added to the TD errors so that every transition can be sampled
+    """
+
+    def __init__(self, *args, alpha: float = 0.6, beta: float = 0.4, eps: float = 1e-6, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.alpha = alpha
+        self.beta = beta
+        self.eps = eps
+        self._max_priority = 1.0
+        self._init_priorities()
+        self.last_indices: np.ndarray = None
+        self.last_weights: np.ndarray = None
+
+    def _init_priorities(self):
+        self._priorities = SumTree(self.capacity)
+
+    def _set_priorities(self, indices, priorities):
+        self._priorities[indices] = priorities
+
+    def append(self, *args, **kwargs):
+        index = self._index
+        super().append(*args, **kwargs)
+        self._set_priorities(index, self._max_priority)
+
+    def extend(self, states, *args, **kwargs):
+        index, n = self._index, min(len(states), self.capacity)
+        super().extend(states, *args, **kwargs)
+        self._set_priorities((index + np.arange(n)) & self._mask, self._max_priority)
+
+    def _sample_indices(self, n) -> np.ndarray:
+        total = self._priorities.total
+        indices = self._priorities.find((np.arange(n) + self._rng.random(n)) * (total / n))
+        # Rounding in the internal sums can send the descent into an empty (zero-priority) leaf
+        # past the stored transitions
+        indices = np.minimum(indices, self._size - 1)
+        weights = (self._size * self._priorities[indices] / total) ** -self.beta
+        self.last_indices = indices
+        self.last_weights = (weights / weights.max()).astype(np.float32)
+        return indices
+
+    def update_priorities(self, indices, errors):
+        """Set the priorities of the storage rows ``indices`` from their absolute TD errors."""
+        priorities = (np.abs(np.asarray(errors, dtype=np.float64)) + self.eps) ** self.alpha
+        self._max_priority = max(self._max_priority, priorities.max())
+        self._set_priorities(indices, priorities)
+
+
+class LaBERMixin(PrioritizedMixin):
+    """Mixin that adds Large Batch Experience Replay (LaBER) sampling to ``ArrayReplayBuffer``.
+
+    As described in https://arxiv.org/abs/2110.01528. A large batch of
+    ``oversampling_factor * n`` transitions is drawn uniformly, and ``n`` of them are drawn again
+    with probability proportional to their stored priorities. The priorities are a flat array, so
+    no sum tree has to be maintained. ``last_weights`` are the LaBER-mean weights, i.e. the mean
+    priority of the large batch divided by the priority of each selected transition.
+
+    Args:
+        oversampling_factor (int): size of the large batch relative to the sampled batch
+    """
+
+    def __init__(self, *args, oversampling_factor: int = 4, **kwargs):
+        self.oversampling_factor = oversampling_factor
+        super().__init__(*args, **kwargs)
+
+    def _init_priorities(self):
+        self._priorities = np.zeros(self.capacity, dtype=np.float64)
+
+    def _set_priorities(self, indices, priorities):
+        self._priorities[indices] = priorities
+
+    def _sample_indices(self, n) -> np.ndarray:
+        candidates = self._rng.integers(0, self._size, n * self.oversampling_factor)
+        priorities = self._priorities[candidates]
+        selected = self._rng.choice(len(candidates), n, p=priorities / priorities.sum())
+        self.last_indices = candidates[selected]
+        self.last_weights = (priorities.mean() / priorities[selected]).astype(np.float32)
+        return self.last_indices
+
+
+class PrioritizedArrayReplayBuffer(PrioritizedMixin, ArrayReplayBuffer):
+    """``ArrayReplayBuffer`` with proportional prioritized sampling (see ``PrioritizedMixin``)."""
+
+
+class LaBERArrayReplayBuffer(LaBERMixin, ArrayReplayBuffer):
+    """``ArrayReplayBuffer`` with LaBER sampling (see ``LaBERMixin``)."""
@@ -1,8 +1,13 @@
 import collections
 import pickle
-from typing import Optional
+from typing import Dict, Optional, Tuple, Union
 
+import numpy as np
+import torch
+
+from rl_algos.buffers.batch import TrainingBatch
 from rl_algos.collections.random_access_queue import RandomAccessQueue
+from rl_algos.utils.sample_n_k import sample_indices
 from rl_algos.utils.transpose_list_dict import transpose_list_dict
 
 from .abstract_replay_buffer import AbstractReplayBuffer
@@ -14,54 +19,183 @@ class ReplayBuffer(AbstractReplayBuffer):
     As described in
     https://storage.googleapis.com/deepmind-media/dqn/DQNNaturePaper.pdf.
 
+    Transitions are stored as a structure of arrays: each field (state, action, ...) is a
+    pre-allocated circular ``torch.Tensor`` on ``device`` whose shape is determined by the first
+    transition appended. Floating point fields are stored as float32. Since the storage already
+    lives on ``device``, sampled batches need no host-to-device copy.
+
     Args:
         capacity (int): capacity in terms of number of transitions
-        num_steps (int): Number of timesteps per stored transition
-            (for N-step updates)
+        device (str or torch.device): device on which transitions are stored
+        rng (np.random.Generator, np.random.SeedSequence or int, optional): Generator used to draw
+            the sampled indices, or a seed for it. Defaults to a Generator seeded from torch's
+            global RNG, so that ``torch.manual_seed`` keeps sampling reproducible.
     """
 
     # Implements AbstractReplayBuffer.capacity
     capacity: Optional[int] = None
 
-    def __init__(self, capacity: Optional[int] = None):
+    def __init__(
+        self,
+        capacity: Optional[int] = None,
+        device: Union[str, torch.device] = "cpu",
+        rng: Union[np.random.Generator, np.random.SeedSequence, int, None] = None,
+    ):
         self.capacity = int(capacity)
-        self.memory = RandomAccessQueue(maxlen=capacity)
+        self.device = torch.device(device)
+        if rng is None:
+            rng = int(torch.randint(2**62, ()))
+        self._rng = np.random.default_rng(rng)
+        self.memory: Dict[str, torch.Tensor] = {}
+        self._index = 0  # position where the next transition is written
+        self._size = 0
 
     def append(self, state, next_state, action, reward, terminal, reset, **kwargs):
-        transition = dict(
-            state=state,
-            action=action,
-            reward=reward,
-            next_state=next_state,
-            terminal=terminal,
-            reset=reset,
+        self.extend(
+            states=[state],
+            next_states=[next_state],
+            actions=[action],
+            rewards=[reward],
+            terminals=[terminal],
+            resets=[reset],
+            **{key: [value] for key, value in kwargs.items()}
+        )
+
+    def extend(self, states, next_states, actions, rewards, terminals, resets, **kwargs):
+        """Append a batch of transitions with at most two slice assignments per field."""
+        transitions = dict(
+            state=states,
+            action=actions,
+            reward=rewards,
+            next_state=next_states,
+            terminal=terminals,
+            reset=resets,
             **kwargs
         )
+        transitions = {
+            key: torch.as_tensor(np.asarray(value)) for key, value in transitions.items()
+        }
+        if not self.memory:
+            self._allocate(transitions)
+
+        n = len(transitions["state"])
+        if n > self.capacity:
+            transitions = {key: value[-self.capacity :] for key, value in transitions.items()}
+            n = self.capacity
+
+        n_first = min(n, self.capacity - self._index)
+        for key, value in transitions.items():
+            memory = self.memory[key]
+            memory[self._index : self._index + n_first].copy_(value[:n_first])
+            memory[: n - n_first].copy_(value[n_first:])
+
+        self._index = (self._index + n) % self.capacity
+        self._size = min(self._size + n, self.capacity)
+
+    def _allocate(self, transitions: Dict[str, torch.Tensor]):
+        self.memory = {
+            key: torch.empty(
+                (self.capacity,) + value.shape[1:],
+                dtype=torch.float32 if value.is_floating_point() else value.dtype,
+                device=self.device,
+            )
+            for key, value in transitions.items()
+        }
 
-        self.memory.append(transition)
+    @property
+    def state_shape(self) -> Optional[Tuple[int, ...]]:
+        return tuple(self.memory["state"].shape[1:]) if self.memory else None
+
+    @property
+    def action_shape(self) -> Optional[Tuple[int, ...]]:
+        return tuple(self.memory["action"].shape[1:]) if self.memory else None
+
+    @property
+    def dtype(self) -> torch.dtype:
+        return self.memory["state"].dtype if self.memory else torch.float32
+
+    def _physical_index(self, idx):
+        return (self._index - self._size + idx) % self.capacity
 
     def __getitem__(self, idx):
         if isinstance(idx, int):
-            return self.memory[idx]
+            if not -self._size <= idx < self._size:
+                raise IndexError("ReplayBuffer index out of range")
+            i = self._physical_index(idx % self._size)
+            return {key: memory[i] for key, memory in self.memory.items()}
         elif isinstance(idx, slice):
-            start, stop, step = idx.indices(len(self.memory))
-            return transpose_list_dict([self.memory[i] for i in range(start, stop, step)])
+            i = self._physical_index(torch.arange(*idx.indices(self._size), device=self.device))
+            return {key: memory[i] for key, memory in self.memory.items()}
+
+    def _sample_indices(self, n) -> torch.Tensor:
+        """Return the storage rows of n distinct transitions drawn uniformly at random.
+
+        The indices are drawn on the host in O(n) and copied to ``device``, which is cheaper than
+        a full ``torch.randperm`` of the buffer.
+        """
+        i = sample_indices(self._size, n, self._rng)
+        return torch.from_numpy(i).to(self.device)
 
     def sample(self, n):
-        assert len(self.memory) >= n
-        s = self.memory.sample(n)
-        return transpose_list_dict(s)
+        """Sample n distinct transitions uniformly at random on ``device``."""
+        assert self._size >= n
+        i = self._sample_indices(n)
+        return {key: memory[i] for key, memory in self.memory.items()}
+
+    def sample_into(self, batch: TrainingBatch):
+        """Sample ``len(batch)`` transitions and write them into the tensors of ``batch``.
+
+        Fields whose device and dtype match the storage are gathered with
+        ``torch.index_select(..., out=)``, so no new tensors are allocated for them. If the
+        transitions were stored without ``n_steps``, ``batch.n_steps`` is filled with 1.
+        """
+        n = len(batch)
+        assert self._size >= n
+        i = self._sample_indices(n)
+        for key in ("state", "next_state", "action", "reward", "terminal", "reset", "n_steps"):
+            out = getattr(batch, key)
+            if out is None:
+                continue
+            if key not in self.memory:
+                out.fill_(1)
+                continue
+            memory = self.memory[key]
+            if out.device == memory.device and out.dtype == memory.dtype:
+                torch.index_select(memory, 0, i, out=out)
+            else:
+                out.copy_(memory[i])
 
     def __len__(self):
-        return len(self.memory)
+        return self._size
 
     def save(self, filename):
         with open(filename, "wb") as f:
-            pickle.dump(self.memory, f)
+            pickle.dump(
+                dict(
+                    memory={key: memory.cpu() for key, memory in self.memory.items()},
+                    index=self._index,
+                    size=self._size,
+                ),
+                f,
+            )
 
     def load(self, filename):
         with open(filename, "rb") as f:
-            self.memory = pickle.load(f)
-        if isinstance(self.memory, collections.deque):
-            # Load v0.2
-            self.memory = RandomAccessQueue(self.memory, maxlen=self.memory.maxlen)
+            data = pickle.load(f)
+        if isinstance(data, (collections.deque, RandomAccessQueue)):
+            # Load a buffer saved as a queue of transitions
+            self.memory, self._index, self._size = {}, 0, 0
+            if len(data) > 0:
+                transitions = transpose_list_dict(list(data))
+                self.extend(
+                    states=transitions.pop("state"),
+                    next_states=transitions.pop("next_state"),
+                    actions=transitions.pop("action"),
+                    rewards=transitions.pop("reward"),
+                    terminals=transitions.pop("terminal"),
+                    resets=transitions.pop("reset"),
+                    **transitions
+                )
+        else:
+            self.memory = {key: memory.to(self.device) for key, memory in data["memory"].items()}
+            self._index, self._size = data["index"], data["size"]
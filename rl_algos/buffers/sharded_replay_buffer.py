@@ -0,0 +1,103 @@
+from typing import Dict, List, Tuple, Union
+
+import numpy as np
+import torch
+
+from rl_algos.buffers.abstract_replay_buffer import AbstractReplayBuffer
+from rl_algos.buffers.array_replay_buffer import ArrayReplayBuffer
+from rl_algos.buffers.batch import TrainingBatch
+from rl_algos.utils.sample_n_k import sample_indices
+
+
+class ShardedReplayBuffer(AbstractReplayBuffer):
+    """Replay buffer made of one ``ArrayReplayBuffer`` shard per environment.
+
+    Each environment only ever writes to its own shard, so writers never share a write position
+    and need no synchronization with each other. Sampling draws distinct indices uniformly over
+    the transitions of all shards, i.e. each shard is chosen in proportion to its size, and
+    gathers the selected rows shard by shard.
+
+    Args:
+        num_shards (int): number of shards, i.e. of environments
+        capacity (int): capacity of each shard in terms of number of transitions
+        state_shape (tuple of int): shape of a single state
+        action_shape (tuple of int): shape of a single action
+        dtype: dtype in which states and actions are stored
+        rng (np.random.Generator, np.random.SeedSequence or int, optional): Generator used for
+            sampling, or a seed for it. Defaults to a freshly seeded ``np.random.default_rng()``.
+    """
+
+    def __init__(
+        self,
+        num_shards: int,
+        capacity: int,
+        state_shape: Union[int, Tuple[int, ...]],
+        action_shape: Union[int, Tuple[int, ...]],
+        dtype=np.float32,
+        rng: Union[np.random.Generator, np.random.SeedSequence, int, None] = None,
+    ):
+        self.shards: List[ArrayReplayBuffer] = [
+            ArrayReplayBuffer(capacity, state_shape, action_shape, dtype) for _ in range(num_shards)
+        ]
+        self._rng = np.random.default_rng(rng)
+
+    @property
+    def capacity(self) -> int:
+        return sum(shard.capacity for shard in self.shards)
+
+    @property
+    def state_shape(self) -> Tuple[int, ...]:
+        return self.shards[0].state_shape
+
+    @property
+    def action_shape(self) -> Tuple[int, ...]:
+        return self.shards[0].action_shape
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self.shards[0].dtype
+
+    def append(self, state, next_state, action, reward, terminal, reset, env_id: int = 0):
+        self.shards[env_id].append(state, next_state, action, reward, terminal, reset)
+
+    def extend(self, states, next_states, actions, rewards, terminals, resets):
+        """Append one transition per environment, where the i-th transition goes to shard i."""
+        for env_id, transition in enumerate(
+            zip(states, next_states, actions, rewards, terminals, resets)
+        ):
+            self.shards[env_id].append(*transition)
+
+    def sample(self, n) -> Dict[str, torch.Tensor]:
+        """Sample n distinct transitions uniformly over all shards as CPU tensors."""
+        sizes = np.array([len(shard) for shard in self.shards])
+        starts = np.cumsum(sizes) - sizes
+        indices = sample_indices(sizes.sum(), n, self._rng)
+        shard_ids = np.searchsorted(starts, indices, side="right") - 1
+        rows = indices - starts[shard_ids]
+
+        sampled = {
+            key: np.empty((n, *memory.shape[1:]), dtype=memory.dtype)
+            for key, memory in self.shards[0].memory.items()
+        }
+        for shard_id in np.unique(shard_ids):
+            selected = shard_ids == shard_id
+            for key, memory in self.shards[shard_id].memory.items():
+                sampled[key][selected] = memory[rows[selected]]
+        return {key: torch.from_numpy(value) for key, value in sampled.items()}
+
+    def sample_into(self, batch: TrainingBatch):
+        """Sample ``len(batch)`` transitions and write them into the tensors of ``batch``."""
+        for key, value in self.sample(len(batch)).items():
+            if getattr(batch, key) is not None:
+                getattr(batch, key).copy_(value)
+
+    def __len__(self):
+        return sum(len(shard) for shard in self.shards)
+
+    def save(self, filename):
+        for i, shard in enumerate(self.shards):
+            shard.save(f"{filename}.{i}")
+
+    def load(self, filename):
+        for i, shard in enumerate(self.shards):
+            shard.load(f"{filename}.{i}")
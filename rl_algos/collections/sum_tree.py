@@ -0,0 +1,91 @@
+import numpy as np
+
+try:
+    import numba
+except ImportError:  # numba is optional; fall back to the vectorized NumPy implementation
+    numba = None
+
+
+if numba is not None:
+
+    @numba.njit(cache=True)
+    def _set_values(tree: np.ndarray, nodes: np.ndarray, values: np.ndarray):
+        if len(nodes) == 0:
+            return
+        for k in range(len(nodes)):
+            node = nodes[k]
+            tree[node] = values[k]
+            node //= 2
+            while node >= 1:
+                tree[node] = tree[2 * node] + tree[2 * node + 1]
+                node //= 2
+
+    @numba.njit(cache=True)
+    def _find_leaves(tree: np.ndarray, values: np.ndarray, depth: int) -> np.ndarray:
+        nodes = np.empty(len(values), dtype=np.int64)
+        for k in range(len(values)):
+            value, node = values[k], 1
+            for _ in range(depth):
+                left = tree[2 * node]
+                if value >= left:
+                    value -= left
+                    node = 2 * node + 1
+                else:
+                    node = 2 * node
+            nodes[k] = node
+        return nodes
+
+else:
+
+    def _set_values(tree: np.ndarray, nodes: np.ndarray, values: np.ndarray):
+        if len(nodes) == 0:
+            return
+        tree[nodes] = values
+        while nodes[0] > 1:
+            nodes = np.unique(nodes // 2)
+            tree[nodes] = tree[2 * nodes] + tree[2 * nodes + 1]
+
+    def _find_leaves(tree: np.ndarray, values: np.ndarray, depth: int) -> np.ndarray:
+        nodes = np.ones(len(values), dtype=np.int64)
+        for _ in range(depth):
+            left = tree[2 * nodes]
+            go_right = values >= left
+            values = values - left * go_right
+            nodes = 2 * nodes + go_right
+        return nodes
+
+
+class SumTree(object):
+    """Binary tree of non-negative values in which each node holds the sum of its children.
+
+    The tree is an implicit binary heap in a single array of length ``2 * capacity``: the leaves
+    are ``tree[capacity:]`` and the node ``i`` has children ``2 * i`` and ``2 * i + 1``, so the
+    root ``tree[1]`` is the total. Updating values is O(log N) and finding the leaves at which
+    given prefix sums are reached is O(n log N). Both loops are compiled with Numba if it is
+    installed, and vectorized with NumPy otherwise.
+
+    Args:
+        capacity (int): number of leaves (rounded up to a power of two)
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = 1 << (int(capacity) - 1).bit_length()
+        self.depth = self.capacity.bit_length() - 1
+        self.tree = np.zeros(2 * self.capacity, dtype=np.float64)
+
+    @property
+    def total(self) -> float:
+        return self.tree[1]
+
+    def __getitem__(self, indices):
+        return self.tree[self.capacity + np.asarray(indices)]
+
+    def __setitem__(self, indices, values):
+        nodes = self.capacity + np.atleast_1d(indices).astype(np.int64)
+        values = np.broadcast_to(np.asarray(values, dtype=np.float64), nodes.shape)
+        _set_values(self.tree, nodes, np.ascontiguousarray(values))
+
+    def find(self, values: np.ndarray) -> np.ndarray:
+        """Return, for each value in ``[0, total)``, the leaf at which the prefix sum exceeds it."""
+        values = np.minimum(np.asarray(values, dtype=np.float64), np.nextafter(self.total, 0))
+        return _find_leaves(self.tree, values, self.depth) - self.capacity
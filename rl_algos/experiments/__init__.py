@@ -1,6 +1,6 @@
 from rl_algos.experiments.evaluator import Evaluator
 from rl_algos.experiments.recorder import Recoder
-from rl_algos.experiments.training import training
+from rl_algos.experiments.training import training, training_with_async_rollout
 from rl_algos.experiments.transition_generator import TransitionGenerator
 
-__all__ = ["TransitionGenerator", "Recoder", "Evaluator", "training"]
+__all__ = ["TransitionGenerator", "Recoder", "Evaluator", "training", "training_with_async_rollout"]
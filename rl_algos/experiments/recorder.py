@@ -23,17 +23,28 @@ def record_videos_from_actor(
         env.reset()
         env = PixelObservationWrapper(env, pixels_only=False)
 
+        max_episode_steps = getattr(env.spec, "max_episode_steps", None)
+        # initial frame + frames recorded every `frame_skip` steps
+        max_frames = 1024 if max_episode_steps is None else max_episode_steps // frame_skip + 2
+
         for i in range(num_videos):
-            video = []
             state_and_pixels, _ = env.reset()
-            video.append(state_and_pixels["pixels"].transpose(2, 0, 1))
+            height, width, channel = state_and_pixels["pixels"].shape
+            video = np.empty(
+                (max_frames, channel, height, width), dtype=state_and_pixels["pixels"].dtype
+            )
+            video[0] = state_and_pixels["pixels"].transpose(2, 0, 1)
+            num_frames = 1
             reward_sum = 0
             step = 0
             while True:
                 action = actor(state_and_pixels["state"])
                 state_and_pixels, reward, terminated, truncated, info = env.step(action)
                 if step % frame_skip == 0:
-                    video.append(state_and_pixels["pixels"].transpose(2, 0, 1))
+                    if num_frames == len(video):
+                        video = np.concatenate([video, np.empty_like(video)])
+                    video[num_frames] = state_and_pixels["pixels"].transpose(2, 0, 1)
+                    num_frames += 1
                 reward_sum += reward
                 step += 1
                 if terminated or truncated:
@@ -42,7 +53,7 @@ def record_videos_from_actor(
             logger.info(
                 f"Recording video {i+1}/{num_videos}, reward_sum={reward_sum}, step = {step}"
             )
-            videos.append(np.array(video))
+            videos.append(video[:num_frames])
 
         return videos
     elif isinstance(dir, str):
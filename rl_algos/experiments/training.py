@@ -1,4 +1,6 @@
 import logging
+import queue
+import threading
 from statistics import mean, stdev
 from typing import Optional
 
@@ -15,6 +17,42 @@ def __add_header_to_dict_key(d: dict, header: str):
     return {header + "/" + k: v for k, v in d.items()}
 
 
+def __evaluate_and_record(
+    agent: AgentBase,
+    actor,
+    evaluator: Optional[Evaluator],
+    recorder: Optional[Recoder],
+    step: int,
+    logger: logging.Logger,
+):
+    with agent.eval_mode():
+        # Evaluate
+        if evaluator is not None:
+            scores = evaluator.evaluate_if_necessary(step, actor)
+            if len(scores) > 0:
+                logger.info(f"Evaluate Agent: mean_score: {mean(scores)} (stdev: {stdev(scores)})")
+                wandb.log({"step": step, "eval/mean": mean(scores), "eval/stdev": stdev(scores)})
+        if recorder is not None:
+            # Record videos
+            videos = recorder.record_videos_if_necessary(step, actor)
+            for video in videos:
+                wandb.log({"step": step, "video": wandb.Video(video, fps=60, format="mp4")})
+
+
+def __log_statistics(
+    agent: AgentBase, interactions: TransitionGenerator, step: int, logger: logging.Logger
+):
+    stats = agent.get_statistics()
+    logger.info(stats)
+    wandb.log(
+        {
+            "step": step,
+            **__add_header_to_dict_key(stats, "train"),
+            **__add_header_to_dict_key(interactions.get_statistics(), "train"),
+        }
+    )
+
+
 def training(
     env: Env,
     agent: AgentBase,
@@ -35,43 +73,80 @@ def training(
             actions=actions,
             rewards=rewards,
             terminals=terminated,
-            resets=terminated,
+            resets=terminated | truncated,
+        )
+        __evaluate_and_record(
+            agent, actor, evaluator, recorder, interactions.total_step.sum(), logger
         )
-        with agent.eval_mode():
-            # Evaluate
-            if evaluator is not None:
-                scores = evaluator.evaluate_if_necessary(interactions.total_step.sum(), actor)
-                if len(scores) > 0:
-                    logger.info(
-                        f"Evaluate Agent: mean_score: {mean(scores)} (stdev: {stdev(scores)})"
-                    )
-                    wandb.log(
-                        {
-                            "step": interactions.total_step.sum(),
-                            "eval/mean": mean(scores),
-                            "eval/stdev": stdev(scores),
-                        }
-                    )
-            if recorder is not None:
-                # Record videos
-                videos = recorder.record_videos_if_necessary(interactions.total_step.sum(), actor)
-                for video in videos:
-                    wandb.log(
-                        {
-                            "step": interactions.total_step.sum(),
-                            "video": wandb.Video(video, fps=60, format="mp4"),
-                        }
-                    )
-
         if agent.just_updated and (interactions.total_step.sum() % logging_interval == 0):
-            stats = agent.get_statistics()
-            logger.info(stats)
-            wandb.log(
-                {
-                    "step": interactions.total_step.sum(),
-                    **__add_header_to_dict_key(stats, "train"),
-                    **__add_header_to_dict_key(interactions.get_statistics(), "train"),
-                }
+            __log_statistics(agent, interactions, interactions.total_step.sum(), logger)
+
+    return agent
+
+
+def training_with_async_rollout(
+    env: Env,
+    agent: AgentBase,
+    max_steps: int,
+    logging_interval: int = 1,
+    evaluator: Optional[Evaluator] = None,
+    recorder: Optional[Recoder] = None,
+    logger: logging.Logger = logging.getLogger(__name__),
+    queue_size: int = 128,
+):
+    """Same as ``training``, but the environment is stepped in a background thread.
+
+    The rollout thread acts and steps ``env`` and pushes transitions into a queue, while the
+    calling thread pops them and runs ``agent.observe`` (and thus the agent's updates). Since
+    ``env.step`` of simulators such as MuJoCo releases the GIL, environment steps overlap with
+    the updates. The agent itself is only touched while holding a lock, so the policy is never
+    read during an optimizer step. Transitions may be collected by a policy that is up to
+    ``queue_size`` steps behind the latest one.
+    """
+    lock = threading.Lock()
+    transitions: queue.Queue = queue.Queue(maxsize=queue_size)
+
+    def actor(state):
+        return agent.act(state)
+
+    def locked_actor(state):
+        with lock:
+            return agent.act(state)
+
+    interactions = TransitionGenerator(env, locked_actor, max_step=max_steps)
+
+    def rollout():
+        try:
+            for _, states, next_states, actions, rewards, terminated, truncated, _ in interactions:
+                transitions.put((states, next_states, actions, rewards, terminated, truncated))
+            transitions.put(None)
+        except BaseException as e:
+            transitions.put(e)
+
+    thread = threading.Thread(target=rollout, name="rollout", daemon=True)
+    thread.start()
+
+    step = 0
+    while True:
+        transition = transitions.get()
+        if transition is None:
+            break
+        if isinstance(transition, BaseException):
+            raise transition
+        states, next_states, actions, rewards, terminated, truncated = transition
+        step += interactions.num_envs
+        with lock:
+            agent.observe(
+                states=states,
+                next_states=next_states,
+                actions=actions,
+                rewards=rewards,
+                terminals=terminated,
+                resets=terminated | truncated,
             )
+            __evaluate_and_record(agent, actor, evaluator, recorder, step, logger)
+            if agent.just_updated and (step % logging_interval == 0):
+                __log_statistics(agent, interactions, step, logger)
 
+    thread.join()
     return agent
@@ -52,10 +52,13 @@ class TransitionGenerator(Iterator):
 
         # If the environment is not a VectorEnv, wrap it in a SyncVectorEnv
         if not isinstance(self.env, VectorEnv):
-            self.env = SyncVectorEnv([lambda: self.env])
+            self.env = SyncVectorEnv([lambda: self.env], copy=False)
 
-        # Reset the environment and get the initial state
-        self.state, info = self.env.reset()
+        # Reset the environment and get the initial state.
+        # self.state is always a private copy, since vector envs created with copy=False return
+        # their internal observation buffer, which is overwritten by the next step.
+        state, info = self.env.reset()
+        self.state = np.copy(state)
 
         # Initialize various counters and flags
         self.num_envs: int = self.env.num_envs
@@ -102,31 +105,33 @@ class TransitionGenerator(Iterator):
             StopIteration: If the maximum number of steps or episodes has been reached.
         """
         # Reset episode reward and step if the episode has terminated or been truncated
-        self.episode_reward *= np.invert(self.terminated | self.truncated)
-        self.episode_step *= np.invert(self.terminated | self.truncated)
+        finished = self.terminated | self.truncated
+        self.episode_reward[finished] = 0
+        self.episode_step[finished] = 0
 
         # Stop iteration if the maximum number of steps or episodes has been reached
         if self.is_finish():
             raise StopIteration()
 
-        # Copy the current state, get the action from the actor, and take a step in the environment
-        state = np.copy(self.state)
+        # Get the action from the actor and take a step in the environment.
+        # self.state is only ever rebound, never written, so it can be handed out without a copy.
+        state = self.state
         action = self.actor(state)
         next_state, reward, self.terminated, self.truncated, info = self.env.step(action)
 
-        # Update the current state
-        self.state = np.copy(next_state)
+        # Update the current state with the only copy of the observation made per step
+        next_state = self.state = np.copy(next_state)
 
         # Check if the episode has finished
         episode_finish = self.terminated | self.truncated
 
         # Update total episode and step counters
         self.total_episode += episode_finish
-        self.total_step += np.ones_like(self.total_episode)
+        self.total_step += 1
 
         # Update episode reward and step counters
         self.episode_reward += np.nan_to_num(reward)
-        self.episode_step += np.ones_like(self.episode_step)
+        self.episode_step += 1
 
         def process_episode_finished_environment(
             env_idx,
@@ -17,27 +17,31 @@ class GaussianExplorer(ExplorerBase):
         high (float, array_like of floats, or None): Higher bound of action
             space used to clip an action after adding a noise. If set to None,
             clipping is not performed on upper edge.
+        rng (np.random.Generator, np.random.SeedSequence or int, optional): Generator used for
+            the noise of numpy actions, or a seed for it. Defaults to a freshly seeded
+            ``np.random.default_rng()``.
     """
 
-    def __init__(self, scale, low=None, high=None):
+    def __init__(self, scale, low=None, high=None, rng=None):
         self.scale = scale
         self.low = low
         self.high = high
+        self._rng = np.random.default_rng(rng)
 
     def select_action(self, t, greedy_action_func, action_value=None):
         a = greedy_action_func()
         if isinstance(a, np.ndarray):
-            noise = np.random.normal(scale=self.scale, size=a.shape).astype(np.float32)
+            noise = self._rng.standard_normal(a.shape, dtype=np.float32) * self.scale
             if self.low is not None or self.high is not None:
                 return np.clip(a + noise, self.low, self.high)
             else:
                 return a + noise
         elif isinstance(a, torch.Tensor):
-            noise = torch.normal(mean=torch.zeros_like(a), std=self.scale)
+            a = torch.randn_like(a).mul_(self.scale).add_(a)
             if self.low is not None or self.high is not None:
-                return torch.clip(a + noise, self.low, self.high)
+                return a.clamp_(self.low, self.high)
             else:
-                return a + noise
+                return a
 
     def __repr__(self):
         return "GaussianExplorer(scale={}, low={}, high={})".format(self.scale, self.low, self.high)
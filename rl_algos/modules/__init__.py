@@ -1,6 +1,7 @@
 from rl_algos.modules.concat_state_action import ConcatStateAction
 from rl_algos.modules.contexts import evaluating
+from rl_algos.modules.mlp import MLP
 from rl_algos.modules.ortho_init import ortho_init
 from rl_algos.modules.z_score_filter import ZScoreFilter
 
-__all__ = ["ConcatStateAction", "evaluating", "ZScoreFilter", "ortho_init"]
+__all__ = ["ConcatStateAction", "evaluating", "MLP", "ZScoreFilter", "ortho_init"]
@@ -1,9 +1,97 @@
+from typing import Tuple
+
 import torch
+import torch.nn.functional as F
 from torch import nn
+from torch.distributions import Distribution, constraints
 
 from rl_algos.modules.distributions.stochastic_head_base import StochasticHeadBase
 
 
+@torch.jit.script
+def _split_mean_log_scale(x: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor]:
+    # Views of the last dimension; the clamp is fused into the scripted graph.
+    dim_action = x.size(-1) // 2
+    return x[..., :dim_action], torch.clamp(x[..., dim_action:], -20.0, 2.0)
+
+
+@torch.jit.script
+def _tanh_log_abs_det_jacobian(u: torch.Tensor) -> torch.Tensor:
+    # log(1 - tanh(u)^2) = 2 * (log(2) - u - softplus(-2u)) = 2 * (log(2) - u + logsigmoid(2u))
+    return 2.0 * (0.6931471805599453 - u + F.logsigmoid(2.0 * u))
+
+
+@torch.jit.script
+def _squashed_gaussian_rsample(
+    mean: torch.Tensor, log_scale: torch.Tensor
+) -> Tuple[torch.Tensor, torch.Tensor]:
+    """Sample tanh(u) with u ~ N(mean, exp(log_scale)) and return it with its log-probability."""
+    noise = torch.randn_like(mean)
+    u = mean + torch.exp(log_scale) * noise
+    # 0.9189... = log(2 * pi) / 2
+    log_prob = -0.5 * noise * noise - log_scale - 0.9189385332046727
+    log_prob = log_prob - _tanh_log_abs_det_jacobian(u)
+    return torch.tanh(u), log_prob.sum(-1)
+
+
+def _squashed_gaussian_log_prob(
+    mean: torch.Tensor, log_scale: torch.Tensor, value: torch.Tensor
+) -> torch.Tensor:
+    eps = torch.finfo(value.dtype).eps
+    u = torch.atanh(torch.clamp(value, -1.0 + eps, 1.0 - eps))
+    noise = (u - mean) * torch.exp(-log_scale)
+    # 0.9189... = log(2 * pi) / 2
+    log_prob = -0.5 * noise * noise - log_scale - 0.9189385332046727
+    log_prob = log_prob - _tanh_log_abs_det_jacobian(u)
+    return log_prob.sum(-1)
+
+
+class SquashedDiagonalGaussian(Distribution):
+    """Diagonal Gaussian distribution squashed by tanh.
+
+    Equivalent to TransformedDistribution(Independent(Normal(loc, exp(log_scale)), 1),
+    [TanhTransform(cache_size=1)]), but sampling and the log-probability of the sample
+    are computed together by a scripted function.
+
+    Args:
+        loc (Tensor): mean of the Gaussian before squashing.
+        log_scale (Tensor): log of the standard deviation before squashing.
+    """
+
+    arg_constraints = {"loc": constraints.real, "log_scale": constraints.real}
+    support = constraints.independent(constraints.interval(-1.0, 1.0), 1)
+    has_rsample = True
+
+    def __init__(self, loc: torch.Tensor, log_scale: torch.Tensor, validate_args=False):
+        self.loc = loc
+        self.log_scale = log_scale
+        self._cached_sample = None
+        self._cached_log_prob = None
+        super().__init__(loc.shape[:-1], loc.shape[-1:], validate_args=validate_args)
+
+    def rsample_with_log_prob(self, sample_shape=torch.Size()) -> Tuple[torch.Tensor, torch.Tensor]:
+        shape = self._extended_shape(sample_shape)
+        sample, log_prob = _squashed_gaussian_rsample(
+            self.loc.expand(shape), self.log_scale.expand(shape)
+        )
+        self._cached_sample = sample
+        self._cached_log_prob = log_prob
+        return sample, log_prob
+
+    def rsample(self, sample_shape=torch.Size()) -> torch.Tensor:
+        sample, _ = self.rsample_with_log_prob(sample_shape)
+        return sample
+
+    def sample(self, sample_shape=torch.Size()) -> torch.Tensor:
+        with torch.no_grad():
+            return self.rsample(sample_shape)
+
+    def log_prob(self, value: torch.Tensor) -> torch.Tensor:
+        if value is self._cached_sample:
+            return self._cached_log_prob
+        return _squashed_gaussian_log_prob(self.loc, self.log_scale, value)
+
+
 class GaussianHeadWithStateIndependentCovariance(StochasticHeadBase):
     def __init__(self, dim_action):
         super().__init__()
@@ -23,21 +111,8 @@ class SquashedDiagonalGaussianHead(StochasticHeadBase):
         super().__init__()
 
     def forward_stochastic(self, x):
-        mean, log_scale = torch.chunk(x, 2, dim=x.dim() // 2)
-        log_scale = torch.clamp(log_scale, -20.0, 2.0)
-        var = torch.exp(log_scale * 2)
-        base_distribution = torch.distributions.Independent(
-            torch.distributions.Normal(loc=mean, scale=torch.sqrt(var)), 1
-        )
-        # cache_size=1 is required for numerical stability
-        # https://pytorch.org/docs/stable/distributions.html#torch.distributions.transformed_distribution.TransformedDistribution
-        return torch.distributions.transformed_distribution.TransformedDistribution(
-            base_distribution,
-            [
-                torch.distributions.transforms.TanhTransform(cache_size=1),
-            ],
-        )
+        mean, log_scale = _split_mean_log_scale(x)
+        return SquashedDiagonalGaussian(mean, log_scale)
 
     def forward_determistic(self, x):
-        mean, _ = torch.chunk(x, 2, dim=x.dim() // 2)
-        return torch.tanh(mean)
+        return torch.tanh(x[..., : x.size(-1) // 2])
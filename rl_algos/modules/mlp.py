@@ -0,0 +1,56 @@
+from typing import Optional, Sequence
+
+import torch
+import torch.nn.functional as F
+from torch import nn
+
+from rl_algos.modules.ortho_init import ortho_init
+
+
+class MLP(nn.Module):
+    """Multi-layer perceptron with ReLU hidden activations.
+
+    The activations are applied in place with F.relu_, so no extra activation tensor is
+    allocated per hidden layer and no nn.ReLU module is dispatched. The loop over the hidden
+    layers is unrolled by torch.compile, which sees fixed layer shapes.
+
+    Args:
+        in_features (int): Size of the input.
+        out_features (int): Size of the output.
+        hidden_units (Sequence[int]): Sizes of the hidden layers.
+        weight_norm_output (bool): If True, apply weight normalization to the output layer with
+            ``nn.utils.parametrizations.weight_norm``. Parametrized modules cannot be run by
+            torch.jit.script, so use torch.compile with this option.
+        hidden_gain (float, optional): If given, initialize the hidden layers orthogonally with
+            this gain and zero biases. Otherwise PyTorch's default initialization is kept.
+        output_gain (float, optional): Same as ``hidden_gain`` for the output layer. A small
+            value such as 0.01 keeps the initial outputs close to zero.
+    """
+
+    def __init__(
+        self,
+        in_features: int,
+        out_features: int,
+        hidden_units: Sequence[int] = (256, 256),
+        weight_norm_output: bool = False,
+        hidden_gain: Optional[float] = None,
+        output_gain: Optional[float] = None,
+    ):
+        super().__init__()
+        units = [in_features, *hidden_units]
+        self.hidden_layers = nn.ModuleList(
+            [nn.Linear(n_in, n_out) for n_in, n_out in zip(units[:-1], units[1:])]
+        )
+        self.output_layer = nn.Linear(units[-1], out_features)
+        if hidden_gain is not None:
+            for layer in self.hidden_layers:
+                ortho_init(layer, gain=hidden_gain)
+        if output_gain is not None:
+            ortho_init(self.output_layer, gain=output_gain)
+        if weight_norm_output:
+            self.output_layer = nn.utils.parametrizations.weight_norm(self.output_layer)
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        for layer in self.hidden_layers:
+            x = F.relu_(layer(x))
+        return self.output_layer(x)
@@ -1,15 +1,20 @@
+from rl_algos.utils.compile_module import compile_module
 from rl_algos.utils.conjugate_gradient import conjugate_gradient
 from rl_algos.utils.is_state_terminal import is_state_terminal
 from rl_algos.utils.logger import logger
-from rl_algos.utils.manual_seed import manual_seed
+from rl_algos.utils.manual_seed import manual_seed, seed_numpy, seed_python, seed_torch
 from rl_algos.utils.statistics import clear_if_maxlen_is_none, mean_or_nan, var_or_nan
 from rl_algos.utils.sync_param import synchronize_parameters
 
 __all__ = [
     "manual_seed",
+    "seed_torch",
+    "seed_numpy",
+    "seed_python",
     "is_state_terminal",
     "synchronize_parameters",
     "conjugate_gradient",
+    "compile_module",
     "clear_if_maxlen_is_none",
     "mean_or_nan",
     "var_or_nan",
@@ -0,0 +1,25 @@
+import functools
+import types
+
+import torch
+from torch import nn
+
+
+def _call(forward, *args, **kwargs):
+    return forward(*args, **kwargs)
+
+
+def compile_module(module: nn.Module, **kwargs) -> nn.Module:
+    """Compile ``module.forward`` in place with ``torch.compile(**kwargs)``.
+
+    Unlike ``nn.Module.compile``, each module gets a recompilation cache of its own. Dynamo keeps
+    compiled graphs per code object, and every module's call goes through the same code, so the
+    guards of all compiled modules (their types, shapes, grad mode, ...) count against one
+    ``recompile_limit``; with the networks of a few agents it is quickly exceeded, and Dynamo
+    silently falls back to eager. Here the forward is called through a fresh copy of a small
+    trampoline function instead. Parameters and ``state_dict`` keys are unchanged.
+    """
+    code = _call.__code__.replace(co_name=f"_call_{type(module).__name__}")
+    call = torch.compile(types.FunctionType(code, _call.__globals__, code.co_name), **kwargs)
+    module.forward = functools.partial(call, module.forward)
+    return module
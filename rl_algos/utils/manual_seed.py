@@ -6,17 +6,48 @@ import numpy as np
 import torch
 
 
+def seed_torch(seed: int):
+    """Seed torch (and CUDA, if it has been initialized) and make cuDNN deterministic."""
+    torch.manual_seed(seed)
+    torch.backends.cudnn.benchmark = False
+    torch.backends.cudnn.deterministic = True
+
+
+def seed_numpy(seed: int):
+    """Seed NumPy's legacy global RNG and the default RNG of gymnasium environments."""
+    np.random.seed(seed)
+    gymnasium.Env._np_random, _ = gymnasium.utils.seeding.np_random(seed)
+
+
+def seed_python(seed: int):
+    """Seed Python's ``random`` module."""
+    random.seed(seed)
+
+
 def manual_seed(
     seed: int = 0,
     torch_seed: Optional[int] = None,
     random_seed: Optional[int] = None,
     np_seed: Optional[int] = None,
-):
+    use_torch: bool = True,
+    use_numpy: bool = True,
+    use_python: bool = True,
+) -> Optional[np.random.SeedSequence]:
+    """Seed the requested global RNGs and return a SeedSequence built from ``seed``.
+
+    Only the libraries enabled by ``use_torch``, ``use_numpy`` and ``use_python`` are seeded, so
+    e.g. NumPy-only determinism does not pay for torch's (CUDA) RNG initialization. Components
+    that take an ``rng`` argument (e.g. ``ArrayReplayBuffer`` or ``GaussianExplorer``) should get
+    their own child of the returned SeedSequence, e.g. ``rng=seed_sequence.spawn(1)[0]``, instead
+    of sharing the process-global NumPy state. Returns None without seeding anything if ``seed``
+    is None.
+    """
     if seed is None:
-        return
-    torch.manual_seed(seed if torch_seed is None else torch_seed)
-    random.seed(seed if random_seed is None else random_seed)
-    np.random.seed(seed if np_seed is None else np_seed)
-    torch.backends.cudnn.benchmark = False
-    torch.backends.cudnn.deterministic = True
-    gymnasium.Env._np_random, _ = gymnasium.utils.seeding.np_random(seed)
+        return None
+    if use_torch:
+        seed_torch(seed if torch_seed is None else torch_seed)
+    if use_python:
+        seed_python(seed if random_seed is None else random_seed)
+    if use_numpy:
+        seed_numpy(seed if np_seed is None else np_seed)
+    return np.random.SeedSequence(seed)
@@ -1,3 +1,5 @@
+from typing import Optional
+
 import numpy as np
 
 
@@ -26,3 +28,23 @@ def sample_n_k(n, k):
                     j = k
             selected_add(x)
         return result[:k]
+
+
+def sample_indices(size: int, n: int, rng: Optional[np.random.Generator] = None) -> np.ndarray:
+    """Sample n distinct elements uniformly from range(size) in O(n) for n << size.
+
+    Draws slightly more than n indices at once, removes duplicates with np.unique and redraws the
+    shortfall until n distinct indices are found. np.unique sorts, so the distinct indices are
+    shuffled before n of them are taken. When n is a sizable fraction of size, redrawing would
+    take many rounds, so rng.choice without replacement is used instead.
+    """
+    if not 0 <= n <= size:
+        raise ValueError("Sample larger than population or is negative")
+    rng = np.random.default_rng() if rng is None else rng
+    if 3 * n >= size:
+        return rng.choice(size, n, replace=False)
+    indices = np.unique(rng.integers(0, size, n * 11 // 10 + 1))
+    while len(indices) < n:
+        indices = np.unique(np.concatenate([indices, rng.integers(0, size, n - len(indices))]))
+    rng.shuffle(indices)
+    return indices[:n]
@@ -2,6 +2,7 @@ import collections
 from typing import Dict, Iterable, List
 
 import numpy as np
+import torch
 
 
 def mean_or_nan(data: Iterable):
@@ -24,19 +25,42 @@ def clear_if_maxlen_is_none(*datum: collections.deque):
             data.clear()
 
 
+class _Record(list):
+    """List of recorded values that can also hold tensors until the statistics are flushed."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.tensors: List[torch.Tensor] = []
+
+    def append_tensor(self, tensor: torch.Tensor):
+        """Record a scalar or a batch of values without synchronizing with the device.
+
+        The values are cloned on the device, since the recorded tensor may be an output buffer
+        that is overwritten before ``sync`` (e.g. by a model compiled with CUDA graphs).
+        """
+        self.tensors.append(torch.atleast_1d(tensor.detach()).clone())
+
+    def sync(self):
+        if self.tensors:
+            self.extend(torch.cat(self.tensors).cpu().numpy())
+            self.tensors.clear()
+
+
 class Statistics(object):
     def __init__(self) -> None:
         self._memory: Dict[list] = dict()
 
-    def __call__(self, key, methods=["mean"]) -> List[np.ndarray]:
+    def __call__(self, key, methods=["mean"]) -> _Record:
         if key not in self._memory:
-            self._memory[key] = {"data": list(), "methods": methods}
+            self._memory[key] = {"data": _Record(), "methods": methods}
         return self._memory[key]["data"]
 
     def flush(self):
         stats = {}
 
         for key, memory in self._memory.items():
+            # copy the recorded tensors to the host once per flush
+            memory["data"].sync()
             for method in memory["methods"]:
                 stats[f"{key}_{method}"] = {
                     "mean": lambda x: np.mean(x, axis=0),
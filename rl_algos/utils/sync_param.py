@@ -1,28 +1,61 @@
+from typing import Iterable, List, Union
+
 import torch
+from torch import nn
+
+
+def _as_module_list(link: Union[nn.Module, Iterable[nn.Module]]) -> List[nn.Module]:
+    links = [link] if isinstance(link, nn.Module) else list(link)
+    # Unwrap data parallel modules so that their state_dict keys match the unwrapped ones
+    return [
+        (
+            link.module
+            if isinstance(link, (nn.parallel.DistributedDataParallel, nn.DataParallel))
+            else link
+        )
+        for link in links
+    ]
 
 
 def copy_param(target_link, source_link):
     """Copy parameters of a link to another link."""
-    target_link.load_state_dict(source_link.state_dict())
+    for target, source in zip(_as_module_list(target_link), _as_module_list(source_link)):
+        target.load_state_dict(source.state_dict())
 
 
 def soft_copy_param(target_link, source_link, tau):
-    """Soft-copy parameters of a link to another link."""
-    target_dict = target_link.state_dict()
-    source_dict = source_link.state_dict()
-    for k, target_value in target_dict.items():
-        source_value = source_dict[k]
-        if source_value.dtype in [torch.float32, torch.float64, torch.float16]:
-            assert target_value.shape == source_value.shape
-            target_value.mul_(1 - tau)
-            target_value.add_(tau * source_value)
-        else:
-            # Scalar type
-            # Some modules such as BN has scalar value `num_batches_tracked`
-            target_dict[k] = source_value
+    """Soft-copy parameters of a link to another link.
+
+    All floating point tensors are updated together by two foreach kernels.
+    """
+    target_values, source_values = [], []
+    for target, source in zip(_as_module_list(target_link), _as_module_list(source_link)):
+        target_dict = target.state_dict()
+        source_dict = source.state_dict()
+        for k, target_value in target_dict.items():
+            source_value = source_dict[k]
+            if source_value.dtype in [torch.float32, torch.float64, torch.float16]:
+                assert target_value.shape == source_value.shape
+                target_values.append(target_value)
+                source_values.append(source_value)
+            else:
+                # Scalar type
+                # Some modules such as BN has scalar value `num_batches_tracked`
+                target_value.copy_(source_value)
+    if target_values:
+        torch._foreach_mul_(target_values, 1 - tau)
+        torch._foreach_add_(target_values, source_values, alpha=tau)
 
 
 def synchronize_parameters(src, dst, method, tau=None):
+    """Synchronize the parameters of dst with src.
+
+    Args:
+        src (nn.Module or iterable of nn.Module): source module(s).
+        dst (nn.Module or iterable of nn.Module): destination module(s), paired with src.
+        method (str): "hard" or "soft".
+        tau (float): soft update rate, used when method is "soft".
+    """
     {
         "hard": lambda: copy_param(dst, src),
         "soft": lambda: soft_copy_param(dst, src, tau),
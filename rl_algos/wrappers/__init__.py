@@ -3,6 +3,7 @@ from rl_algos.wrappers.cast_observation_reward import (
     CastObservationToFloat32,
     CastRewardToFloat,
 )
+from rl_algos.wrappers.fused_preprocess import FusedPreprocess
 from rl_algos.wrappers.make_env import make_env, vectorize_env
 from rl_algos.wrappers.normalize_action_space import NormalizeActionSpace
 from rl_algos.wrappers.register_reset_env import register_reset_env
@@ -13,6 +14,7 @@ __all__ = [
     "CastObservation",
     "CastObservationToFloat32",
     "CastRewardToFloat",
+    "FusedPreprocess",
     "make_env",
     "vectorize_env",
     "NormalizeActionSpace",
@@ -0,0 +1,48 @@
+import gymnasium
+import gymnasium.spaces
+import numpy as np
+
+
+class FusedPreprocess(gymnasium.Wrapper):
+    """Cast observations to float32, rewards to float and normalize the action space to [-1, 1]^n.
+
+    Does the work of CastObservationToFloat32, CastRewardToFloat and NormalizeActionSpace in one
+    wrapper, so that each env step goes through a single Python wrapper layer. The scale and
+    offset of the action mapping are cached as plain arrays.
+    """
+
+    def __init__(self, env):
+        super().__init__(env)
+        assert isinstance(env.action_space, gymnasium.spaces.Box)
+        if isinstance(env.observation_space, gymnasium.spaces.Box):
+            self.observation_space = gymnasium.spaces.Box(
+                low=env.observation_space.low.astype(np.float32),
+                high=env.observation_space.high.astype(np.float32),
+                dtype=np.float32,
+            )
+        self.action_space = gymnasium.spaces.Box(
+            low=-np.ones_like(env.action_space.low),
+            high=np.ones_like(env.action_space.low),
+        )
+        # [-1, 1] -> [orig_low, orig_high] is action * half_range + mid
+        low, high = env.action_space.low, env.action_space.high
+        self._half_range = (high - low) / 2
+        self._mid = (high + low) / 2
+        self._action_scratch = np.empty_like(self._mid)
+
+    def reset(self, **kwargs):
+        observation, info = self.env.reset(**kwargs)
+        return observation.astype(np.float32, copy=False), info
+
+    def step(self, action):
+        # The action is written into a reused scratch array; env.step consumes it immediately
+        np.multiply(action, self._half_range, out=self._action_scratch)
+        np.add(self._action_scratch, self._mid, out=self._action_scratch)
+        observation, reward, terminated, truncated, info = self.env.step(self._action_scratch)
+        return (
+            observation.astype(np.float32, copy=False),
+            float(reward),
+            terminated,
+            truncated,
+            info,
+        )
@@ -1,4 +1,5 @@
 from functools import partial
+from typing import Optional
 
 import gymnasium
 import numpy as np
@@ -6,25 +7,40 @@ from gymnasium.vector.async_vector_env import AsyncVectorEnv
 from gymnasium.vector.sync_vector_env import SyncVectorEnv
 from gymnasium.vector.vector_env import VectorEnv
 
-from rl_algos.wrappers.cast_observation_reward import CastObservationToFloat32, CastRewardToFloat
-from rl_algos.wrappers.normalize_action_space import NormalizeActionSpace
+from rl_algos.wrappers.fused_preprocess import FusedPreprocess
 
 
 def make_env(env_id, **kwargs) -> gymnasium.Env:
     env = gymnasium.make(env_id, **kwargs)
-    env = CastObservationToFloat32(env)
-    env = CastRewardToFloat(env)
-    env = NormalizeActionSpace(env)
+    env = FusedPreprocess(env)
     return env
 
 
-def vectorize_env(env_id: str, num_envs: int = 1, env_fn=make_env) -> VectorEnv:
+def vectorize_env(
+    env_id: str,
+    num_envs: int = 1,
+    env_fn=make_env,
+    asynchronous: Optional[bool] = None,
+    copy: bool = True,
+) -> VectorEnv:
+    """Make a vector env of ``num_envs`` copies of ``env_fn(env_id=env_id)``.
+
+    If ``asynchronous`` is True, each env is stepped in its own process by AsyncVectorEnv, which
+    runs concurrently with the learner. Otherwise the envs are stepped in this process by
+    SyncVectorEnv. If None, AsyncVectorEnv is used only when ``num_envs > 1``.
+
+    If ``copy`` is False, the observations returned by ``reset`` and ``step`` are views of an
+    internal buffer that the next ``step`` overwrites. This saves a copy per step when the caller
+    copies them anyway, as ``TransitionGenerator`` does.
+    """
+    if asynchronous is None:
+        asynchronous = num_envs > 1
     env_fns = [partial(env_fn, env_id=env_id) for _ in range(num_envs)]
-    if num_envs == 1:
-        envs = SyncVectorEnv(env_fns)
-        envs._rewards = envs._rewards.astype(np.float32)
+    if asynchronous:
+        envs = AsyncVectorEnv(env_fns, copy=copy)
     else:
-        envs = AsyncVectorEnv(env_fns)
+        envs = SyncVectorEnv(env_fns, copy=copy)
+        envs._rewards = envs._rewards.astype(np.float32)
 
     dummy_env = env_fns[0]()
 
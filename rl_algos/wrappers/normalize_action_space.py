@@ -17,15 +17,13 @@ class NormalizeActionSpace(gymnasium.ActionWrapper):
             high=np.ones_like(env.action_space.low),
         )
 
-    def action(self, action):
-        # action is in [-1, 1]
-        action = action.copy()
-
-        # -> [0, 2]
-        action += 1
+        # [-1, 1] -> [orig_low, orig_high] is action * half_range + mid
+        low, high = env.action_space.low, env.action_space.high
+        self._half_range = (high - low) / 2
+        self._mid = (high + low) / 2
+        self._action_scratch = np.empty_like(self._mid)
 
-        # -> [0, orig_high - orig_low]
-        action *= (self.env.action_space.high - self.env.action_space.low) / 2
-
-        # -> [orig_low, orig_high]
-        return action + self.env.action_space.low
+    def action(self, action):
+        # The result is written into a reused scratch array; env.step consumes it immediately
+        np.multiply(action, self._half_range, out=self._action_scratch)
+        return np.add(self._action_scratch, self._mid, out=self._action_scratch)
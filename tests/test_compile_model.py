@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+import torch
+
+from rl_algos.agents import DDPG, SAC, TD3
+
+
+def _run(agent, dim_state, dim_action, num_steps=12):
+    for _ in range(num_steps):
+        agent.observe(
+            states=np.zeros((1, dim_state), np.float32),
+            next_states=np.zeros((1, dim_state), np.float32),
+            actions=np.zeros((1, dim_action), np.float32),
+            rewards=np.ones(1, np.float32),
+            terminals=np.zeros(1, bool),
+            resets=np.zeros(1, bool),
+        )
+    agent.act(np.zeros((1, dim_state), np.float32))
+    with agent.eval_mode():
+        agent.act(np.zeros((1, dim_state), np.float32))
+
+
+@pytest.mark.parametrize("agent_class", [SAC, DDPG, TD3])
+def test_two_compiled_agents_do_not_hit_recompile_limit(agent_class):
+    torch._dynamo.reset()
+    with torch._dynamo.config.patch(fail_on_recompile_limit_hit=True):
+        # e.g. the agents of two environments trained in the same process
+        for dim_state, dim_action in ((3, 2), (5, 1)):
+            agent = agent_class(
+                dim_state,
+                dim_action,
+                batch_size=8,
+                replay_start_size=8,
+                device="cpu",
+                compile_model=True,
+            )
+            _run(agent, dim_state, dim_action)